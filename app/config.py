@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseSettings
 
 
@@ -5,6 +7,25 @@ class Settings(BaseSettings):
     DATABASE_USERNAME: str
     DATABASE_PASSWORD: str
     DATABASE_FQDN: str
+    DATABASE_ASYNC: bool = False
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30
+    DATABASE_POOL_PRE_PING: bool = False
+    DATABASE_POOL_RECYCLE: int = -1
+    DATABASE_MIGRATE_ON_STARTUP: bool = True
+    HTTP_CACHE_MAX_AGE: int = 0
+    CACHE_MAX_SIZE: int = 1024
+    CACHE_TTL_SECONDS: float = 60
+    CACHE_NOTIFY: bool = True
+    QUERY_LOG: bool = False
+    QUERY_LOG_SLOW_SECONDS: float = 0.1
+    QUERY_LOG_REPEAT_THRESHOLD: int = 5
+    PROFILE_DIRECTORY: Optional[str] = None
+    PROFILE_SECRET: Optional[str] = None
+    PROFILE_SAMPLE_RATE: float = 0
+    PROFILE_INTERVAL_SECONDS: float = 0.001
+    ADMIN_TOKEN: Optional[str] = None
 
     class Config:
         env_file = ".env"
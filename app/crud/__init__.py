@@ -1,6 +1,11 @@
 from app.crud._account import account
+from app.crud._account_balance import account_balance
+from app.crud._cache import Cache, caches, decode_invalidations, encode_invalidations
+from app.crud._cache_listener import CacheListener
 from app.crud._category import category
+from app.crud._category_month import category_month
 from app.crud._crud import Crud
 from app.crud._named_crud import NamedCrud
 from app.crud._payee import payee
+from app.crud._table_version import table_version
 from app.crud._transaction import transaction
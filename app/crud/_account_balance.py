@@ -0,0 +1,76 @@
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.dialects import postgresql
+from sqlmodel import Session, func
+
+from app import model
+from app.crud._account import account
+from app.crud._table_version import table_version
+
+# Balances are float sums, so allow for rounding differences of up to half a cent
+TOLERANCE = 0.005
+
+
+class CrudAccountBalance:
+    def __init__(self):
+        self.model_database = model.AccountBalanceDatabase
+
+    def add(self, session: Session, deltas: dict[int, float]) -> None:
+        values = [
+            {"account_id": account_id, "balance": delta}
+            for account_id, delta in sorted(deltas.items())
+            if delta != 0
+        ]
+        if not values:
+            return
+
+        statement = postgresql.insert(self.model_database).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[self.model_database.account_id],
+            set_={"balance": self.model_database.balance + statement.excluded.balance},
+        )
+        session.execute(statement)
+
+    def rebuild(self, session: Session) -> None:
+        session.execute(text('LOCK TABLE "transaction" IN SHARE MODE'))
+        session.execute(delete(self.model_database))
+        session.execute(
+            insert(self.model_database).from_select(
+                ["account_id", "balance"], self._select_actual()
+            )
+        )
+        # Account responses embed the balances, so the rebuild must change their ETags and
+        # evict them like an account write
+        table_version.bump(session, ["account"])
+        account.cache.invalidate_on_commit(session, None)
+
+    def get_mismatches(self, session: Session):
+        actual = self._select_actual().subquery()
+        stored_balance = func.coalesce(self.model_database.balance, 0).label("stored_balance")
+        actual_balance = func.coalesce(actual.c.balance, 0).label("actual_balance")
+        statement = (
+            select(model.AccountDatabase.id, stored_balance, actual_balance)
+            .join(self.model_database, isouter=True)
+            .join(actual, model.AccountDatabase.id == actual.c.account_id, isouter=True)
+            .where(func.abs(stored_balance - actual_balance) > TOLERANCE)
+            .order_by(model.AccountDatabase.id)
+        )
+        result = session.execute(statement)
+        rows = result.all()
+
+        return rows
+
+    @staticmethod
+    def _select_actual():
+        statement = (
+            select(
+                model.TransactionDatabase.account_id,
+                func.sum(model.TransactionDatabase.value).label("balance"),
+            )
+            .where(model.TransactionDatabase.account_id.is_not(None))
+            .group_by(model.TransactionDatabase.account_id)
+        )
+
+        return statement
+
+
+account_balance = CrudAccountBalance()
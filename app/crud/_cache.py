@@ -0,0 +1,153 @@
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Optional, TypeVar
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+T = TypeVar("T")
+
+CHANNEL = "cache_invalidation"
+# NOTIFY payloads must be shorter than 8000 bytes
+MAX_PAYLOAD_LENGTH = 7_000
+# Tells this process' own notifications apart, which it has already applied
+PROCESS_TOKEN = uuid.uuid4().hex
+
+_INVALIDATIONS_KEY = "cache_invalidations"
+
+caches: list["Cache"] = []
+
+
+# Bounded LRU cache whose entries also expire after `ttl_seconds`, the bound on how stale other
+# processes' writes can leave keys without table versions. Keys are ("row", id, ...) for single
+# rows, anything else for pages, which any write may change
+class Cache:  # pylint: disable=too-many-instance-attributes  # Counters exported as metrics
+    def __init__(self, name: str, max_size: int, ttl_seconds: float):
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._generation = 0
+        caches.append(self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_load(self, key: Hashable, load: Callable[[], T]) -> T:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            self.misses += 1
+            generation = self._generation
+
+        value = load()
+
+        with self._lock:
+            # Skipped if invalidated meanwhile, as `value` may predate the write
+            if generation == self._generation and self.max_size > 0:
+                self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+        return value
+
+    # Drops the rows of `ids` and every page, or everything if `ids` is None
+    def invalidate(self, ids: Optional[Iterable[int]]) -> None:
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            if ids is None:
+                self._entries.clear()
+                return
+
+            ids = set(ids)
+            for key in list(self._entries):
+                if not (isinstance(key, tuple) and key[0] == "row") or key[1] in ids:
+                    del self._entries[key]
+
+    # Also resets the counters
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.invalidations = 0
+
+    # Invalidates once `session` commits, so concurrent reads can't cache the data being
+    # replaced, everything if `ids` is None. Nothing happens if it rolls back
+    def invalidate_on_commit(self, session: Session, ids: Optional[Iterable[int]]) -> None:
+        invalidations = session.info.setdefault(_INVALIDATIONS_KEY, [])
+        invalidations.append((self, None if ids is None else list(ids)))
+
+
+# Invalidation messages for the other processes, in the same shape as `decode_invalidations`
+# returns. Ids are left out (meaning every row) when they don't fit in a NOTIFY payload
+def encode_invalidations(invalidations: list[tuple["Cache", Optional[list[int]]]]) -> str:
+    ids_by_name: dict[str, Optional[set[int]]] = {}
+    for cache, ids in invalidations:
+        name_ids = ids_by_name.get(cache.name, set())
+        ids_by_name[cache.name] = None if ids is None or name_ids is None else name_ids | set(ids)
+
+    message = {
+        "source": PROCESS_TOKEN,
+        "invalidations": {
+            name: None if ids is None else sorted(ids) for name, ids in ids_by_name.items()
+        },
+    }
+    payload = json.dumps(message, separators=(",", ":"))
+    if len(payload) > MAX_PAYLOAD_LENGTH:
+        message["invalidations"] = {name: None for name in ids_by_name}
+        payload = json.dumps(message, separators=(",", ":"))
+
+    return payload
+
+
+# Returns the invalidations of a payload from another process, by cache name
+def decode_invalidations(payload: str) -> dict[str, Optional[list[int]]]:
+    message = json.loads(payload)
+    if message["source"] == PROCESS_TOKEN:
+        return {}
+
+    return message["invalidations"]
+
+
+# NOTIFY is transactional too, so other processes only hear about committed writes
+@event.listens_for(Session, "before_commit")
+def _notify(session: Session) -> None:
+    invalidations = session.info.get(_INVALIDATIONS_KEY)
+    if not invalidations or not settings.CACHE_NOTIFY:
+        return
+
+    session.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": CHANNEL, "payload": encode_invalidations(invalidations)},
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate(session: Session) -> None:
+    for cache, ids in session.info.pop(_INVALIDATIONS_KEY, []):
+        cache.invalidate(ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session) -> None:
+    session.info.pop(_INVALIDATIONS_KEY, None)
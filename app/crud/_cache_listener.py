@@ -0,0 +1,73 @@
+import logging
+import select
+import threading
+from typing import Optional, cast
+
+from psycopg2.extensions import connection as PsycopgConnection
+from sqlalchemy.engine import Engine
+
+from app.crud._cache import CHANNEL, caches, decode_invalidations
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 1.0
+RECONNECT_SECONDS = 5.0
+
+
+# Applies other processes' cache invalidations, received through LISTEN on a dedicated
+# connection outside the pool, in a daemon thread
+class CacheListener:
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception:  # pylint: disable=broad-except  # Any failure must reconnect
+                logger.exception("Cache listener failed, reconnecting")
+                self._stop.wait(RECONNECT_SECONDS)
+
+    def _listen(self) -> None:
+        cargs, cparams = self.engine.dialect.create_connect_args(self.engine.url)
+        # LISTEN needs the driver's own notifications API
+        connection = cast(PsycopgConnection, self.engine.dialect.connect(*cargs, **cparams))
+        try:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            # Notifications sent while not listening are lost
+            for cache in caches:
+                cache.invalidate(None)
+
+            while not self._stop.is_set():
+                readable, _, _ = select.select([connection], [], [], POLL_SECONDS)
+                if not readable:
+                    continue
+
+                connection.poll()
+                while connection.notifies:
+                    notify = connection.notifies.pop(0)
+                    self._apply(notify.payload)
+        finally:
+            connection.close()
+
+    def _apply(self, payload: str) -> None:
+        caches_by_name = {cache.name: cache for cache in caches}
+        for name, ids in decode_invalidations(payload).items():
+            cache = caches_by_name.get(name)
+            if cache is not None:
+                cache.invalidate(ids)
@@ -1,3 +1,9 @@
+from datetime import date
+from functools import partial
+from typing import Optional
+
+from sqlalchemy import select, true
+from sqlalchemy.engine import Row
 from sqlmodel import Session, func
 
 from app import model
@@ -9,25 +15,65 @@ class CrudCategory(
         model.CategoryInput, model.CategoryDatabase, model.CategoryOutput, model.CategoryUpdate
     ]
 ):
-    def get_full(self, session: Session, id_: int):
-        budget = self.model_database.budget
-        expenditure = func.coalesce(func.sum(model.TransactionDatabase.value), 0).label(
-            "expenditure"
+    # Full rows with the expenditure of a single month, `month` being its first day
+    def get_many_month(
+        self, session: Session, month: date, skip: int, limit: int, *, after: Optional[tuple] = None
+    ) -> list[Row]:
+        versions = self.get_versions(session)
+        rows = self.cache.get_or_load(
+            ("month", month, skip, limit, after, versions),
+            partial(self._load_many_month, session, month, skip, limit, after=after),
         )
-        available = (budget + expenditure).label("available")
-        row = self._get_full(session, id_, budget, expenditure, available)
 
-        return row
+        return rows
 
-    def get_many_full(self, session: Session, skip: int, limit: int):
-        budget = self.model_database.budget
-        expenditure = func.coalesce(func.sum(model.TransactionDatabase.value), 0).label(
-            "expenditure"
-        )
-        available = (budget + expenditure).label("available")
-        rows = self._get_many_full(session, skip, limit, budget, expenditure, available)
+    def _load_many_month(
+        self, session: Session, month: date, skip: int, limit: int, *, after: Optional[tuple] = None
+    ) -> list[Row]:
+        statement = self._paginate(self._select_month(month), skip, limit, after)
+        result = session.execute(statement)
+        rows = result.all()
 
         return rows
 
+    # Sums the monthly rollups instead of the transactions. Lateral, so the expenditure is
+    # computed once for both output columns
+    def _select_full(self, source):
+        expenditure = (
+            select(
+                func.coalesce(func.sum(model.CategoryMonthDatabase.expenditure), 0).label(
+                    "expenditure"
+                )
+            )
+            .where(model.CategoryMonthDatabase.category_id == source.c.id)
+            .lateral()
+        )
+        statement = select(
+            source.c.id,
+            source.c.name,
+            source.c.budget,
+            expenditure.c.expenditure,
+            (source.c.budget + expenditure.c.expenditure).label("available"),
+        ).join_from(source, expenditure, true())
+
+        return statement
+
+    def _select_month(self, month: date):
+        expenditure = func.coalesce(model.CategoryMonthDatabase.expenditure, 0)
+        statement = select(
+            self.model_database.id,
+            self.model_database.name,
+            self.model_database.budget,
+            expenditure.label("expenditure"),
+            (self.model_database.budget + expenditure).label("available"),
+        ).join(
+            model.CategoryMonthDatabase,
+            (model.CategoryMonthDatabase.category_id == self.model_database.id)
+            & (model.CategoryMonthDatabase.month == month),
+            isouter=True,
+        )
+
+        return statement
+
 
 category = CrudCategory(model.CategoryDatabase)
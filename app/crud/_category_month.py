@@ -0,0 +1,105 @@
+from datetime import date
+
+from sqlalchemy import Date, delete, insert, or_, select, text
+from sqlalchemy.dialects import postgresql
+from sqlmodel import Session, func
+
+from app import model
+from app.crud._category import category
+from app.crud._table_version import table_version
+
+# Expenditures are float sums, so allow for rounding differences of up to half a cent
+TOLERANCE = 0.005
+
+
+class CrudCategoryMonth:
+    def __init__(self):
+        self.model_database = model.CategoryMonthDatabase
+
+    # `deltas` maps (category id, month) to (expenditure delta, count delta)
+    def add(self, session: Session, deltas: dict[tuple[int, date], tuple[float, int]]) -> None:
+        values = [
+            {"category_id": category_id, "month": month, "expenditure": expenditure, "count": count}
+            for (category_id, month), (expenditure, count) in sorted(deltas.items())
+            if expenditure != 0 or count != 0
+        ]
+        if not values:
+            return
+
+        statement = postgresql.insert(self.model_database).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[self.model_database.category_id, self.model_database.month],
+            set_={
+                "expenditure": self.model_database.expenditure + statement.excluded.expenditure,
+                "count": self.model_database.count + statement.excluded.count,
+            },
+        )
+        session.execute(statement)
+
+    def rebuild(self, session: Session) -> None:
+        session.execute(text('LOCK TABLE "transaction" IN SHARE MODE'))
+        session.execute(delete(self.model_database))
+        session.execute(
+            insert(self.model_database).from_select(
+                ["category_id", "month", "expenditure", "count"], self._select_actual()
+            )
+        )
+        # The category table is left as is, but its responses embed the rebuilt expenditures
+        table_version.bump(session, ["category"])
+        category.cache.invalidate_on_commit(session, None)
+
+    def get_mismatches(self, session: Session):
+        actual = self._select_actual().subquery()
+        category_id = func.coalesce(self.model_database.category_id, actual.c.category_id)
+        month = func.coalesce(self.model_database.month, actual.c.month)
+        stored_expenditure = func.coalesce(self.model_database.expenditure, 0)
+        actual_expenditure = func.coalesce(actual.c.expenditure, 0)
+        stored_count = func.coalesce(self.model_database.count, 0)
+        actual_count = func.coalesce(actual.c.count, 0)
+        statement = (
+            select(
+                category_id.label("category_id"),
+                month.label("month"),
+                stored_expenditure.label("stored_expenditure"),
+                actual_expenditure.label("actual_expenditure"),
+                stored_count.label("stored_count"),
+                actual_count.label("actual_count"),
+            )
+            .select_from(self.model_database)
+            .join(
+                actual,
+                (self.model_database.category_id == actual.c.category_id)
+                & (self.model_database.month == actual.c.month),
+                full=True,
+            )
+            .where(
+                or_(
+                    func.abs(stored_expenditure - actual_expenditure) > TOLERANCE,
+                    stored_count != actual_count,
+                )
+            )
+            .order_by(category_id, month)
+        )
+        result = session.execute(statement)
+        rows = result.all()
+
+        return rows
+
+    @staticmethod
+    def _select_actual():
+        month = func.date_trunc("month", model.TransactionDatabase.date_time).cast(Date)
+        statement = (
+            select(
+                model.TransactionDatabase.category_id,
+                month.label("month"),
+                func.sum(model.TransactionDatabase.value).label("expenditure"),
+                func.count().label("count"),
+            )
+            .where(model.TransactionDatabase.category_id.is_not(None))
+            .group_by(model.TransactionDatabase.category_id, month)
+        )
+
+        return statement
+
+
+category_month = CrudCategoryMonth()
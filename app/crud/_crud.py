@@ -1,8 +1,16 @@
 import abc
-from typing import Generic, Optional, Type, TypeVar
+from datetime import datetime
+from typing import AsyncIterator, Generic, Iterable, Optional, Type, TypeVar
 
+from sqlalchemy import ARRAY, DateTime, Integer, Table, any_, bindparam, inspect, sql, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
 from sqlmodel import Session, select
 
+from app import database
+from app.crud import _cursor
+from app.database import AnySession
 from app.model import ModelDatabase, ModelInput, ModelOutput, ModelUpdate
 
 AnyModelInput = TypeVar("AnyModelInput", bound=ModelInput)
@@ -14,12 +22,25 @@ AnyModelUpdate = TypeVar("AnyModelUpdate", bound=ModelUpdate)
 class Crud(Generic[AnyModelInput, AnyModelDatabase, AnyModelOutput, AnyModelUpdate], abc.ABC):
     def __init__(self, model_database: Type[AnyModelDatabase]):
         self.model_database = model_database
+        self.table: Table = inspect(model_database).local_table
 
+    # Inserts with RETURNING, so `_on_write` gets the values as stored (e.g. date times
+    # converted to the session's time zone) rather than as sent
     def create(self, session: Session, input_: AnyModelInput) -> AnyModelDatabase:
-        row = self.model_database(**input_.dict())
-        session.add(row)
+        statement = (
+            sql.insert(self.model_database)
+            .values(**self._bind_values(input_.dict()))
+            .returning(*self.table.c)
+        )
+        result = session.execute(statement)
+        data_new = result.one()._asdict()
+        self._on_write(session, None, data_new)
         session.commit()
-        session.refresh(row)
+
+        # Attached as if loaded by the session, without selecting the row again
+        row = self.model_database(**data_new)
+        make_transient_to_detached(row)
+        session.add(row)
 
         return row
 
@@ -35,31 +56,100 @@ class Crud(Generic[AnyModelInput, AnyModelDatabase, AnyModelOutput, AnyModelUpda
 
         return row
 
-    def get_many(self, session: Session, skip: int, limit: int) -> list[AnyModelDatabase]:
-        statement = select(self.model_database).offset(skip).limit(limit)
+    def get_many(
+        self, session: Session, skip: int, limit: int, after: Optional[tuple] = None
+    ) -> list[AnyModelDatabase]:
+        statement = self._paginate(select(self.model_database), skip, limit, after)
         result = session.exec(statement)
         rows = result.all()
 
         return rows
 
-    def update(self, session: Session, id_: int, update: AnyModelUpdate) -> AnyModelDatabase:
-        row = self.get(session, id_)
-        data_update = update.dict(exclude_unset=True)
-        for key, value in data_update.items():
-            setattr(row, key, value)
-        session.add(row)
-        session.commit()
-
-        assert row is not None
+    # Read-only variants of `get` and `get_many`: they select the table's columns with Core and
+    # return plain rows, skipping the identity map and attribute instrumentation of ORM objects.
+    # `expand` is passed to `_select_rows`
+    def get_row(self, session: Session, id_: int, expand: Iterable[str] = ()) -> Optional[Row]:
+        statement = self._select_rows(expand).where(self.model_database.id == id_)
+        result = session.execute(statement)
+        row = result.first()
 
         return row
 
-    def delete(self, session: Session, id_: int) -> AnyModelDatabase:
-        row = self.get(session, id_)
-        session.delete(row)
+    def get_many_rows(
+        self,
+        session: Session,
+        skip: int,
+        limit: int,
+        after: Optional[tuple] = None,
+        *,
+        expand: Iterable[str] = (),
+    ) -> list[Row]:
+        statement = self._paginate(self._select_rows(expand), skip, limit, after)
+        result = session.execute(statement)
+        rows = result.all()
+
+        return rows
+
+    # Reads the rows of `ids` with a single `id = ANY(:ids)`, ordered by id. Missing ids are
+    # left out
+    def get_rows_by_ids(
+        self, session: Session, ids: list[int], expand: Iterable[str] = ()
+    ) -> list[Row]:
+        statement = self._select_rows(expand).where(self._match_ids(self.model_database.id, ids))
+        result = session.execute(statement.order_by(self.model_database.id))
+        rows = result.all()
+
+        return rows
+
+    # Streams every row through a server-side cursor, `batch_size` plain rows at a time
+    def stream(self, session: AnySession, batch_size: int = 1_000) -> AsyncIterator[list[Row]]:
+        statement = self._select_rows().order_by(*self._get_keyset())
+        batches = database.stream(session, statement, batch_size)
+
+        return batches
+
+    # Writes and returns the row with a single UPDATE ... RETURNING, which also returns the old
+    # values (as `old_<column>`) for `_on_write`. Returns None if the row doesn't exist
+    def update(self, session: Session, id_: int, update: AnyModelUpdate) -> Optional[Row]:
+        table = self.table
+        # An empty update still locks and returns the row
+        data_update = update.dict(exclude_unset=True) or {"id": id_}
+        old = sql.select(table).where(table.c.id == id_).with_for_update().subquery("old")
+        statement = (
+            sql.update(self.model_database)
+            .where(self.model_database.id == old.c.id)
+            .values(**self._bind_values(data_update))
+            .returning(*table.c, *[column.label(f"old_{column.key}") for column in old.c])
+            .execution_options(synchronize_session=False)
+        )
+        result = session.execute(statement)
+        row = result.first()
+        if row is None:
+            return None
+
+        data_old = {column.key: row[f"old_{column.key}"] for column in table.c}
+        data_new = {column.key: row[column.key] for column in table.c}
+        self._on_write(session, data_old, data_new)
         session.commit()
 
-        assert row is not None
+        return row
+
+    def delete(self, session: Session, id_: int) -> Optional[Row]:
+        table = self.table
+        statement = (
+            sql.delete(self.model_database)
+            .where(self.model_database.id == id_)
+            .returning(*table.c)
+            .execution_options(synchronize_session=False)
+        )
+        result = session.execute(statement)
+        row = result.first()
+        if row is None:
+            return None
+
+        self._on_write(session, row._asdict(), None)
+        self._expunge(session, id_)
+        session.commit()
 
         return row
 
@@ -69,7 +159,85 @@ class Crud(Generic[AnyModelInput, AnyModelDatabase, AnyModelOutput, AnyModelUpda
         if id_ is None:
             return none_ok
 
-        row = self.get(session, id_, none_ok=True)
+        row = self.get_row(session, id_)
         in_database = row is not None
 
         return in_database
+
+    def encode_cursor(self, row, keyset: Optional[tuple] = None) -> str:
+        keyset = keyset or self._get_keyset()
+        values = [getattr(row, column.key) for column in keyset]
+        cursor = _cursor.encode(values)
+
+        return cursor
+
+    def decode_cursor(self, cursor: str, keyset: Optional[tuple] = None) -> tuple:
+        values = _cursor.decode(cursor, keyset or self._get_keyset())
+
+        return values
+
+    # Columns that uniquely and stably order rows for keyset pagination
+    def _get_keyset(self) -> tuple:
+        return (self.model_database.id,)
+
+    def _paginate(
+        self,
+        statement,
+        skip: int,
+        limit: int,
+        after: Optional[tuple] = None,
+        *,
+        keyset: Optional[tuple] = None,
+        descending: bool = False,
+    ):
+        keyset = keyset or self._get_keyset()
+        if after is not None and descending:
+            statement = statement.where(tuple_(*keyset) < tuple_(*after))
+        elif after is not None:
+            statement = statement.where(tuple_(*keyset) > tuple_(*after))
+        order_by = [column.desc() for column in keyset] if descending else keyset
+        statement = statement.order_by(*order_by).offset(skip).limit(limit)
+
+        return statement
+
+    def _bind_values(self, data: dict) -> dict:
+        return {key: self._bind_value(value) for key, value in data.items()}
+
+    # Aware date times are bound as `timestamptz` and converted to the session's time zone by
+    # the database, as psycopg2 does implicitly. asyncpg rejects them for `timestamp` columns
+    def _bind_value(self, value):
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            return sql.cast(sql.literal(value, DateTime(timezone=True)), DateTime)
+
+        return value
+
+    def _match_ids(self, column, ids: list[int]):
+        return column == any_(bindparam("ids", sorted(set(ids)), type_=ARRAY(Integer)))
+
+    # Each name in `expand` joins the named table referenced by the `<name>_id` column, adding
+    # its name as `<name>_name`. The joins are outer joins, as references may be NULL
+    def _select_rows(self, expand: Iterable[str] = ()):
+        table = self.table
+        statement = select(*table.columns)
+        for name in expand:
+            column = table.c[f"{name}_id"]
+            (foreign_key,) = column.foreign_keys
+            referenced_table = foreign_key.column.table
+            statement = statement.outerjoin(
+                referenced_table, column == referenced_table.c.id
+            ).add_columns(referenced_table.c.name.label(f"{name}_name"))
+
+        return statement
+
+    # Deleted rows leave the session, like with `Session.delete`, instead of being expired and
+    # failing to reload
+    def _expunge(self, session: Session, id_: int) -> None:
+        row = session.identity_map.get(identity_key(self.model_database, id_))
+        if row is not None:
+            session.expunge(row)
+
+    # Runs inside the write's database transaction, right before it is committed
+    def _on_write(
+        self, session: Session, data_old: Optional[dict], data_new: Optional[dict]
+    ) -> None:
+        pass
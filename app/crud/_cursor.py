@@ -0,0 +1,34 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Sequence
+
+from sqlalchemy import Column
+
+
+def encode(values: Sequence[Any]) -> str:
+    data = json.dumps(
+        [value.isoformat() if isinstance(value, datetime) else value for value in values],
+        separators=(",", ":"),
+    )
+    cursor = base64.urlsafe_b64encode(data.encode()).decode()
+
+    return cursor
+
+
+def decode(cursor: str, columns: Sequence[Column]) -> tuple:
+    values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError("Cursor doesn't match the sort columns")
+
+    parsed_values = []
+    for column, value in zip(columns, values):
+        python_type = column.type.python_type
+        if python_type is datetime and isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        if not isinstance(value, python_type) or isinstance(value, bool):
+            raise ValueError(f"Invalid cursor value for `{column.key}`")
+
+        parsed_values.append(value)
+
+    return tuple(parsed_values)
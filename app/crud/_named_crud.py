@@ -1,10 +1,16 @@
 import abc
-from typing import Optional, TypeVar
+from functools import partial
+from typing import Optional, Type, TypeVar
 
+from sqlalchemy import inspect, sql
+from sqlalchemy.engine import Row
 from sqlmodel import Session, select
 
 from app import model
+from app.config import settings
+from app.crud._cache import Cache
 from app.crud._crud import Crud
+from app.crud._table_version import table_version
 from app.model import NamedModelDatabase, NamedModelInput, NamedModelOutput, NamedModelUpdate
 
 AnyNamedModelInput = TypeVar("AnyNamedModelInput", bound=NamedModelInput)
@@ -17,6 +23,12 @@ class NamedCrud(
     Crud[AnyNamedModelInput, AnyNamedModelDatabase, AnyNamedModelOutput, AnyNamedModelUpdate],
     abc.ABC,
 ):
+    def __init__(self, model_database: Type[AnyNamedModelDatabase]):
+        super().__init__(model_database)
+        self.cache = Cache(self.table.name, settings.CACHE_MAX_SIZE, settings.CACHE_TTL_SECONDS)
+        # Full rows aggregate the transactions
+        self.version_names = [self.table.name, "transaction"]
+
     def get_by_name(self, session: Session, name: str) -> Optional[AnyNamedModelDatabase]:
         statement = select(self.model_database).where(self.model_database.name == name)
         result = session.exec(statement)
@@ -24,36 +36,119 @@ class NamedCrud(
 
         return row
 
-    @abc.abstractmethod
-    def get_full(self, session: Session, id_: int):
-        pass
+    # Cached by the versions of `version_names`, those of the response's ETag when it has one,
+    # so other processes' writes are seen even before their invalidations arrive
+    def get_full(self, session: Session, id_: int) -> Optional[Row]:
+        versions = self.get_versions(session)
+        row = self.cache.get_or_load(("row", id_, versions), partial(self._load_full, session, id_))
 
-    def _get_full(self, session: Session, id_: int, *args):
-        statement = (
-            select(self.model_database.id, self.model_database.name, *args)
-            .join(model.TransactionDatabase, isouter=True)
-            .where(self.model_database.id == id_)
-            .group_by(self.model_database.id)
+        return row
+
+    def get_many_full(
+        self, session: Session, skip: int, limit: int, after: Optional[tuple] = None
+    ) -> list[Row]:
+        versions = self.get_versions(session)
+        rows = self.cache.get_or_load(
+            ("page", skip, limit, after, versions),
+            partial(self._load_many_full, session, skip, limit, after),
         )
-        result = session.exec(statement)
-        row = result.first()
+
+        return rows
+
+    def get_versions(self, session: Session) -> tuple[int, ...]:
+        versions = tuple(table_version.get_known(session, self.version_names))
+
+        return versions
+
+    # Not cached: the rows are loaded with a single query, whatever the cache holds
+    def get_full_by_ids(self, session: Session, ids: list[int]) -> list[Row]:
+        table = self.table
+        statement = self._select_full(table).where(self._match_ids(table.c.id, ids))
+        result = session.execute(statement.order_by(table.c.id))
+        rows = result.all()
+
+        return rows
+
+    # The `*_full` writes return the full row in the same statement: the write runs in a CTE
+    # and its RETURNING rows are the source of `_select_full`
+    def create_full(self, session: Session, input_: AnyNamedModelInput) -> Row:
+        table = self.table
+        statement = sql.insert(table).values(**input_.dict()).returning(*table.c)
+        row = self._write_full(session, statement.cte("inserted"))
+        assert row is not None
 
         return row
 
-    @abc.abstractmethod
-    def get_many_full(self, session: Session, skip: int, limit: int):
-        pass
+    def update_full(self, session: Session, id_: int, update: AnyNamedModelUpdate) -> Optional[Row]:
+        data_update = update.dict(exclude_unset=True)
+        if not data_update:
+            return self.get_full(session, id_)
 
-    def _get_many_full(self, session: Session, skip: int, limit: int, *args):
+        table = self.table
         statement = (
-            select(self.model_database.id, self.model_database.name, *args)
-            .join(model.TransactionDatabase, isouter=True)
-            .group_by(self.model_database.id)
-            .order_by(self.model_database.id)
-            .offset(skip)
-            .limit(limit)
+            sql.update(table).where(table.c.id == id_).values(**data_update).returning(*table.c)
         )
-        result = session.exec(statement)
+        row = self._write_full(session, statement.cte("updated"))
+
+        return row
+
+    # Transactions keep existing without the deleted row, like with the ORM relationship. The
+    # aggregates still see the transactions, since every CTE reads the same snapshot
+    def delete_full(self, session: Session, id_: int) -> Optional[Row]:
+        table = self.table
+        transaction_table = inspect(model.TransactionDatabase).local_table
+        reference = next(column for column in transaction_table.c if column.references(table.c.id))
+        detach = (
+            sql.update(transaction_table).where(reference == id_).values({reference: None})
+        ).cte("detached")
+        # Attached to the DELETE, which the output selects from: SQLAlchemy leaves CTEs added to
+        # the outer SELECT out when it joins a LATERAL subquery, like the category's
+        statement = (
+            sql.delete(table)
+            .where(table.c.id == id_)
+            .returning(*table.c)
+            .add_cte(detach)  # type: ignore[attr-defined]  # Missing from the stubs
+        )
+        self._expunge(session, id_)
+        row = self._write_full(session, statement.cte("deleted"))
+
+        return row
+
+    def _write_full(self, session: Session, source) -> Optional[Row]:
+        statement = self._select_full(source)
+        result = session.execute(statement)
+        row = result.first()
+        if row is not None:
+            self.cache.invalidate_on_commit(session, [row.id])
+        session.commit()
+
+        return row
+
+    def _load_full(self, session: Session, id_: int) -> Optional[Row]:
+        table = self.table
+        statement = self._select_full(table).where(table.c.id == id_)
+        result = session.execute(statement)
+        row = result.first()
+
+        return row
+
+    def _load_many_full(
+        self, session: Session, skip: int, limit: int, after: Optional[tuple] = None
+    ) -> list[Row]:
+        statement = self._paginate(self._select_full(self.table), skip, limit, after)
+        result = session.execute(statement)
         rows = result.all()
 
         return rows
+
+    def _on_write(
+        self, session: Session, data_old: Optional[dict], data_new: Optional[dict]
+    ) -> None:
+        ids = {data["id"] for data in [data_old, data_new] if data is not None}
+        self.cache.invalidate_on_commit(session, ids)
+
+    # Selects the output columns of each row of `source`, which is the table or a CTE returning
+    # its columns
+    @abc.abstractmethod
+    def _select_full(self, source):
+        pass
@@ -1,4 +1,4 @@
-from sqlmodel import Session, func
+from sqlmodel import func, select
 
 from app import model
 from app.crud._named_crud import NamedCrud
@@ -7,21 +7,17 @@ from app.crud._named_crud import NamedCrud
 class CrudPayee(
     NamedCrud[model.PayeeInput, model.PayeeDatabase, model.PayeeOutput, model.PayeeUpdate]
 ):
-    def get_full(self, session: Session, id_: int):
-        expenditure = func.coalesce(func.sum(model.TransactionDatabase.value), 0).label(
-            "expenditure"
+    def _select_full(self, source):
+        expenditure = (
+            select(func.sum(model.TransactionDatabase.value))
+            .where(model.TransactionDatabase.payee_id == source.c.id)
+            .scalar_subquery()
         )
-        row = self._get_full(session, id_, expenditure)
-
-        return row
-
-    def get_many_full(self, session: Session, skip: int, limit: int):
-        expenditure = func.coalesce(func.sum(model.TransactionDatabase.value), 0).label(
-            "expenditure"
+        statement = select(
+            source.c.id, source.c.name, func.coalesce(expenditure, 0).label("expenditure")
         )
-        rows = self._get_many_full(session, skip, limit, expenditure)
 
-        return rows
+        return statement
 
 
 payee = CrudPayee(model.PayeeDatabase)
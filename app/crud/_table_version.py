@@ -0,0 +1,54 @@
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session
+
+from app import model
+
+_VERSIONS_KEY = "table_versions"
+
+
+class CrudTableVersion:
+    def __init__(self):
+        self.model_database = model.TableVersionDatabase
+        self.model_change = model.TableVersionChangeDatabase
+
+    # Versions in the order of `names`, 0 for tables never written. Read in one statement, so
+    # changes being folded into `table_version` are counted exactly once
+    def get(self, session: Session, names: list[str]) -> list[int]:
+        change_count = (
+            select(func.count())
+            .where(self.model_change.name == self.model_database.name)
+            .scalar_subquery()
+        )
+        statement = select(
+            self.model_database.name, self.model_database.version + change_count
+        ).where(self.model_database.name.in_(names))
+        result = session.execute(statement)
+        versions = dict(result.all())
+        known_versions = session.info.setdefault(_VERSIONS_KEY, {})
+        known_versions.update({name: versions.get(name, 0) for name in names})
+
+        return [known_versions[name] for name in names]
+
+    # The versions last read by `get` in the session's transaction, like those of the response's
+    # ETag, or read now if some weren't
+    def get_known(self, session: Session, names: list[str]) -> list[int]:
+        known_versions = session.info.get(_VERSIONS_KEY, {})
+        if any(name not in known_versions for name in names):
+            return self.get(session, names)
+
+        return [known_versions[name] for name in names]
+
+    # For writes that change the responses of `names` without writing their tables, like the
+    # summary rebuilds. Counted like the trigger's changes once the session commits
+    def bump(self, session: Session, names: list[str]) -> None:
+        session.execute(insert(self.model_change), [{"name": name} for name in names])
+
+
+@event.listens_for(OrmSession, "after_commit")
+@event.listens_for(OrmSession, "after_rollback")
+def _forget_versions(session: OrmSession) -> None:
+    session.info.pop(_VERSIONS_KEY, None)
+
+
+table_version = CrudTableVersion()
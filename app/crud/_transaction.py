@@ -1,5 +1,41 @@
+import io
+from datetime import date, datetime
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import (
+    ARRAY,
+    DateTime,
+    Integer,
+    any_,
+    bindparam,
+    func,
+    insert,
+    literal,
+    select,
+    union_all,
+)
+from sqlalchemy.engine import Row
+from sqlmodel import Session, col
+
 from app import model
+from app.crud._account import account
+from app.crud._account_balance import account_balance
+from app.crud._category import category
+from app.crud._category_month import category_month
 from app.crud._crud import Crud
+from app.crud._payee import payee
+
+REFERENCES = {
+    "account_id": model.AccountDatabase,
+    "payee_id": model.PayeeDatabase,
+    "category_id": model.CategoryDatabase,
+}
+SORT_KEYSETS = {
+    "date_time": (model.TransactionDatabase.date_time, model.TransactionDatabase.id),
+    "value": (model.TransactionDatabase.value, model.TransactionDatabase.id),
+    "id": (model.TransactionDatabase.id,),
+}
+COPY_COLUMNS = ["date_time", "account_id", "payee_id", "category_id", "value", "comment"]
 
 
 class CrudTransaction(
@@ -10,7 +46,199 @@ class CrudTransaction(
         model.TransactionUpdate,
     ]
 ):
-    pass
+    def get_many_rows(
+        self,
+        session: Session,
+        skip: int,
+        limit: int,
+        after: Optional[tuple] = None,
+        *,
+        expand: Iterable[str] = (),
+        query: Optional[model.TransactionQuery] = None,
+    ) -> list[Row]:
+        query = query or model.TransactionQuery()
+        statement = self._paginate(
+            self.select_many(query, expand),
+            skip,
+            limit,
+            after,
+            keyset=self.get_sort_keyset(query.sort),
+            descending=query.sort.startswith("-"),
+        )
+        result = session.execute(statement)
+        rows = result.all()
+
+        return rows
+
+    # Filters compare bare columns with parameters, never expressions of the columns, so the
+    # reference and date range filters are index conditions of the `(<reference>, date_time)`
+    # and `(date_time, id)` indexes
+    def select_many(self, query: model.TransactionQuery, expand: Iterable[str] = ()):
+        statement = self._select_rows(expand)
+        for column in REFERENCES:
+            value = getattr(query, column)
+            if value is not None:
+                statement = statement.where(getattr(self.model_database, column) == value)
+        if query.date_time_from is not None:
+            statement = statement.where(
+                self.model_database.date_time >= self._bind_value(query.date_time_from)
+            )
+        if query.date_time_to is not None:
+            statement = statement.where(
+                self.model_database.date_time <= self._bind_value(query.date_time_to)
+            )
+        if query.value_min is not None:
+            statement = statement.where(self.model_database.value >= query.value_min)
+        if query.value_max is not None:
+            statement = statement.where(self.model_database.value <= query.value_max)
+        if query.comment is not None:
+            pattern = "%" + _escape_like(query.comment) + "%"
+            statement = statement.where(
+                col(self.model_database.comment).ilike(pattern, escape="\\")
+            )
+
+        return statement
+
+    def get_sort_keyset(self, sort: str) -> tuple:
+        return SORT_KEYSETS[sort.removeprefix("-")]
+
+    # Takes already validated `TransactionInput` data and loads it with a single COPY, or with
+    # an executemany INSERT on drivers without COPY support
+    def create_many(self, session: Session, data_news: list[dict[str, Any]]) -> int:
+        if not data_news:
+            return 0
+
+        data_news = self._to_local_date_times(session, data_news)
+        connection = session.connection()
+        if connection.dialect.driver == "psycopg2":
+            lines = (
+                ",".join(_format_csv_value(data[column]) for column in COPY_COLUMNS)
+                for data in data_news
+            )
+            buffer = io.StringIO("\n".join(lines))
+            with connection.connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f'COPY "{self.model_database.__tablename__}" ({", ".join(COPY_COLUMNS)}) '
+                    "FROM STDIN WITH (FORMAT csv)",
+                    buffer,
+                )
+        else:
+            session.execute(insert(self.model_database), data_news)
+        self._update_summaries(session, [], data_news)
+        session.commit()
+
+        return len(data_news)
+
+    # Returns, for each reference column, the referenced ids that don't exist. All columns
+    # of all rows are checked with a single query
+    def get_missing_references(
+        self, session: Session, data_news: Iterable[dict[str, Any]]
+    ) -> dict[str, set[int]]:
+        referenced_ids: dict[str, set[int]] = {column: set() for column in REFERENCES}
+        for data in data_news:
+            for column, ids in referenced_ids.items():
+                if data.get(column) is not None:
+                    ids.add(data[column])
+
+        statements = [
+            select(literal(column).label("column"), model_database.id).where(
+                model_database.id == any_(bindparam(column, list(ids), type_=ARRAY(Integer)))
+            )
+            for (column, model_database), ids in zip(REFERENCES.items(), referenced_ids.values())
+            if ids
+        ]
+        if not statements:
+            return referenced_ids
+
+        result = session.execute(union_all(*statements))
+        for column, id_ in result:
+            referenced_ids[column].discard(id_)
+
+        return referenced_ids
+
+    def _get_keyset(self) -> tuple:
+        return (self.model_database.date_time, self.model_database.id)
+
+    # COPY drops the offsets of aware date times, so convert them to the session's time zone
+    # first, with the same cast as the `TIMESTAMP WITHOUT TIME ZONE` column applies to single
+    # row writes. All the date times are converted with a single query
+    def _to_local_date_times(
+        self, session: Session, data_news: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        indexes = [i for i, data in enumerate(data_news) if data["date_time"].tzinfo is not None]
+        if not indexes:
+            return data_news
+
+        date_times = bindparam(
+            "date_times",
+            [data_news[i]["date_time"] for i in indexes],
+            type_=ARRAY(DateTime(timezone=True)),
+        )
+        statement = select(
+            func.unnest(date_times).cast(DateTime(timezone=False)).label("date_time")
+        )
+        result = session.execute(statement)
+        data_news = list(data_news)
+        for i, date_time in zip(indexes, result.scalars()):
+            data_news[i] = {**data_news[i], "date_time": date_time}
+
+        return data_news
+
+    def _on_write(
+        self, session: Session, data_old: Optional[dict], data_new: Optional[dict]
+    ) -> None:
+        data_olds = [] if data_old is None else [data_old]
+        data_news = [] if data_new is None else [data_new]
+        self._update_summaries(session, data_olds, data_news)
+
+    def _update_summaries(
+        self, session: Session, data_olds: list[dict], data_news: list[dict]
+    ) -> None:
+        balance_deltas: dict[int, float] = {}
+        category_month_deltas: dict[tuple[int, date], tuple[float, int]] = {}
+        for datas, sign in [(data_olds, -1), (data_news, 1)]:
+            for data in datas:
+                account_id = data["account_id"]
+                if account_id is not None:
+                    balance_deltas[account_id] = (
+                        balance_deltas.get(account_id, 0) + sign * data["value"]
+                    )
+
+                category_id = data["category_id"]
+                if category_id is not None:
+                    key = (category_id, date(data["date_time"].year, data["date_time"].month, 1))
+                    expenditure, count = category_month_deltas.get(key, (0, 0))
+                    category_month_deltas[key] = (expenditure + sign * data["value"], count + sign)
+
+        account_balance.add(session, balance_deltas)
+        category_month.add(session, category_month_deltas)
+
+        # The full rows of every referenced entity change with their transactions
+        for column, cache in [
+            ("account_id", account.cache),
+            ("payee_id", payee.cache),
+            ("category_id", category.cache),
+        ]:
+            ids = {data[column] for data in [*data_olds, *data_news] if data[column] is not None}
+            if ids:
+                cache.invalidate_on_commit(session, ids)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _format_csv_value(value) -> str:
+    if value is None:
+        return ""
+
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"'
+
+    if isinstance(value, datetime):
+        return value.isoformat()
+
+    return repr(value)
 
 
 transaction = CrudTransaction(model.TransactionDatabase)
@@ -1,8 +1,23 @@
-from sqlmodel import Session, SQLModel, create_engine
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, TypeVar, Union
+
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from sqlalchemy import exc, text
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.future import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlmodel import Session, create_engine
 from sqlmodel.engine.create import URL
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app import query_log
 from app.config import settings
 
+AnySession = Union[Session, AsyncSession]
+T = TypeVar("T")
+
 database_url = URL.create(
     drivername="postgresql",
     username=settings.DATABASE_USERNAME,
@@ -11,13 +26,119 @@ database_url = URL.create(
     port=5432,
     database="prod",
 )
-engine = create_engine(database_url)
 
 
-def create_database_and_tables():
-    SQLModel.metadata.create_all(engine)
+class PoolStatistics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, wait_seconds: float, timed_out: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+
+# Measures how long each checkout waits for a pooled connection (including pre-ping)
+class MeasuredQueuePool(QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statistics = PoolStatistics()
+
+    def connect(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.statistics.record(time.perf_counter() - start, timed_out)
+
+
+class MeasuredAsyncAdaptedQueuePool(MeasuredQueuePool, AsyncAdaptedQueuePool):
+    pass
+
+
+def create_pooled_engine(url: URL) -> Engine:
+    return create_engine(
+        url,
+        poolclass=MeasuredQueuePool,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+    )
+
+
+def create_pooled_async_engine(url: URL) -> AsyncEngine:
+    return create_async_engine(
+        url.set(drivername="postgresql+asyncpg"),
+        poolclass=MeasuredAsyncAdaptedQueuePool,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+    )
+
+
+engine = create_pooled_engine(database_url)
+
+if settings.DATABASE_ASYNC:
+    async_engine = create_pooled_async_engine(database_url)
+    session_engine = async_engine.sync_engine
+else:
+    session_engine = engine
 
+if settings.QUERY_LOG:
+    query_log.instrument(session_engine, settings.QUERY_LOG_SLOW_SECONDS)
 
-def get_session():
+
+def _get_session():
     with Session(engine) as session:
         yield session
+
+
+async def _get_async_session():
+    # Expired attributes would be lazy loaded outside `run`, which async sessions can't do
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+get_session = _get_async_session if settings.DATABASE_ASYNC else _get_session
+
+
+# Runs sync database code without blocking the event loop: through the greenlet bridge of
+# async sessions, or in the threadpool for sync sessions
+async def run(session: AnySession, function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    if isinstance(session, AsyncSession):
+        return await session.run_sync(function, *args, **kwargs)
+
+    return await run_in_threadpool(function, session, *args, **kwargs)
+
+
+def ping(session: Session) -> None:
+    session.execute(text("SELECT 1"))
+
+
+async def stream(session: AnySession, statement, batch_size: int) -> AsyncIterator[list[Row]]:
+    if isinstance(session, AsyncSession):
+        async_result = await session.stream(statement)
+        while async_batch := await async_result.fetchmany(batch_size):
+            yield async_batch
+
+        return
+
+    result = await run_in_threadpool(
+        session.execute, statement, execution_options={"stream_results": True}
+    )
+    async for batch in iterate_in_threadpool(result.partitions(batch_size)):
+        yield batch
@@ -1,19 +1,184 @@
-from fastapi import Depends, HTTPException, status
+import hmac
+import tracemalloc
+from datetime import date
+from typing import Any, AsyncIterator, Callable, Optional
+
+from fastapi import Body, Depends, Header, HTTPException, Query, Request, Response, status
 from sqlmodel import Session
 
+from app import crud, diagnostics
+from app.config import settings
 from app.crud import Crud
-from app.database import get_session
+from app.database import AnySession, get_session, run
+from app.metrics import get_route
+
+MAX_IDS = 1_000
 
 
-class ExistentIdChecker:
-    def __init__(self, model_name, crud: Crud):
+# Loads the addressed row once per request, so handlers don't fetch it again. `load` is a
+# crud method like `get` or `get_full`
+class RowLoader:
+    def __init__(self, model_name, load: Callable[[Session, int], Any]):
         self.model_name = model_name
-        self.crud = crud
+        self.load = load
 
-    def __call__(self, id_: int, session: Session = Depends(get_session)) -> int:
-        if not self.crud.is_in_database(session, id_):
+    async def __call__(self, id_: int, session: AnySession = Depends(get_session)):
+        row = await run(session, self.load, id_)
+        if row is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail=f"{self.model_name} not found"
             )
 
-        return id_
+        return row
+
+
+class CursorDecoder:
+    def __init__(self, crud_: Crud):
+        self.crud = crud_
+
+    def __call__(self, after: Optional[str] = None) -> Optional[tuple]:
+        if after is None:
+            return None
+
+        values = self.decode(after)
+
+        return values
+
+    # For handlers whose keyset depends on other parameters, like the sort order
+    def decode(self, after: str, keyset: Optional[tuple] = None) -> tuple:
+        try:
+            values = self.crud.decode_cursor(after, keyset)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            ) from exc
+
+        return values
+
+
+# Answers `If-None-Match` with a 304 from the versions of the tables a response reads, before
+# any query for the response itself. Tables are looked up before the data, so a concurrent write
+# can at worst make clients fetch the same data twice, never keep a stale copy
+class ETagChecker:
+    def __init__(self, table_names: list[str]):
+        self.table_names = table_names
+
+    async def __call__(
+        self, request: Request, response: Response, session: AnySession = Depends(get_session)
+    ) -> str:
+        versions = await run(session, crud.table_version.get, self.table_names)
+        etag = 'W/"' + "-".join(str(version) for version in versions) + '"'
+        headers = {"ETag": etag, "Cache-Control": _get_cache_control()}
+
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None and _matches(if_none_match, etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response.headers.update(headers)
+
+        return etag
+
+
+# Parses a `YYYY-MM` month into its first day
+def decode_month(
+    month: Optional[str] = Query(default=None, regex=r"^\d{4}-(0[1-9]|1[0-2])$")
+) -> Optional[date]:
+    if month is None:
+        return None
+
+    year, month_number = month.split("-")
+    first_day = date(int(year), int(month_number), 1)
+
+    return first_day
+
+
+# Parses the comma separated references to embed in the output
+class ExpandDecoder:
+    def __init__(self, names: list[str]):
+        self.names = names
+
+    def __call__(
+        self,
+        expand: Optional[str] = Query(
+            default=None, description="Comma separated references to embed, with their names"
+        ),
+    ) -> list[str]:
+        if expand is None:
+            return []
+
+        names = list(dict.fromkeys(expand.split(",")))
+        invalid_names = [name for name in names if name not in self.names]
+        if invalid_names:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid expand: {', '.join(invalid_names)}",
+            )
+
+        return names
+
+
+# Parses comma separated ids, read instead of a page
+def decode_ids(
+    ids: Optional[str] = Query(
+        default=None,
+        regex=r"^\d+(,\d+)*$",
+        description="Comma separated ids to read instead of a page, in id order",
+    )
+) -> Optional[list[int]]:
+    if ids is None:
+        return None
+
+    values = [int(id_) for id_ in ids.split(",")]
+    check_ids(values)
+
+    return values
+
+
+# For lists of ids too long for a URL
+def check_ids(ids: list[int] = Body(...)) -> list[int]:
+    if len(ids) > MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"More than {MAX_IDS} ids"
+        )
+
+    return ids
+
+
+# Admin endpoints don't exist unless `ADMIN_TOKEN` is set
+def check_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    if settings.ADMIN_TOKEN is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+
+# Records the memory a request allocates while `tracemalloc` is tracing. The exit code runs
+# after the response is sent, so encoding the response is included
+async def record_memory(request: Request) -> AsyncIterator[None]:
+    if not tracemalloc.is_tracing():
+        yield
+        return
+
+    tracemalloc.reset_peak()
+    start_bytes, _ = tracemalloc.get_traced_memory()
+    yield
+    diagnostics.memory.record(request.method, get_route(request.scope), start_bytes)
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+
+    # Weak comparison, which ignores the `W/` prefix
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    matches = etag.removeprefix("W/") in tags
+
+    return matches
+
+
+def _get_cache_control() -> str:
+    if settings.HTTP_CACHE_MAX_AGE > 0:
+        return f"private, max-age={settings.HTTP_CACHE_MAX_AGE}"
+
+    return "private, no-cache"
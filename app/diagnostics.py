@@ -0,0 +1,91 @@
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Optional
+
+MAX_REQUESTS = 100
+
+
+class RequestMemory:
+    def __init__(self, method: str, route: str, peak_bytes: int, retained_bytes: int):
+        self.method = method
+        self.route = route
+        self.time = time.time()
+        self.peak_bytes = peak_bytes
+        self.retained_bytes = retained_bytes
+
+
+# State of the `tracemalloc` diagnostics of this process: the snapshots taken so far, by id, and
+# the memory of the latest recorded requests
+class MemoryDiagnostics:
+    def __init__(self):
+        self.snapshots: dict[int, tracemalloc.Snapshot] = {}
+        self.requests: deque[RequestMemory] = deque(maxlen=MAX_REQUESTS)
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    def start(self, frames: int) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        with self._lock:
+            self.snapshots.clear()
+            self.requests.clear()
+
+    def get_snapshot_ids(self) -> list[int]:
+        with self._lock:
+            return list(self.snapshots)
+
+    def get_requests(self) -> list[RequestMemory]:
+        with self._lock:
+            return list(self.requests)
+
+    def take_snapshot(self) -> int:
+        # Without the filters, diagnostics' own allocations would dominate the statistics
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ]
+        )
+        with self._lock:
+            id_ = self._next_id
+            self._next_id += 1
+            self.snapshots[id_] = snapshot
+
+        return id_
+
+    def get_statistics(
+        self, id_: int, key_type: str, limit: int
+    ) -> Optional[list[tracemalloc.Statistic]]:
+        snapshot = self.snapshots.get(id_)
+        if snapshot is None:
+            return None
+
+        return snapshot.statistics(key_type)[:limit]
+
+    def compare(
+        self, id_: int, other_id: int, key_type: str, limit: int
+    ) -> Optional[list[tracemalloc.StatisticDiff]]:
+        snapshot = self.snapshots.get(id_)
+        other_snapshot = self.snapshots.get(other_id)
+        if snapshot is None or other_snapshot is None:
+            return None
+
+        return other_snapshot.compare_to(snapshot, key_type)[:limit]
+
+    # The peak is process wide, so concurrent requests inflate each other's peaks
+    def record(self, method: str, route: str, start_bytes: int) -> None:
+        current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        request = RequestMemory(
+            method, route, peak_bytes - start_bytes, current_bytes - start_bytes
+        )
+        with self._lock:
+            self.requests.append(request)
+
+
+memory = MemoryDiagnostics()
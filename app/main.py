@@ -1,10 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import create_database_and_tables
-from app.router import account, category, payee, transaction
+from app import crud, migration
+from app.config import settings
+from app.database import engine
+from app.metrics import MetricsMiddleware
+from app.profiling import ProfilingMiddleware
+from app.query_log import QueryLogMiddleware
+from app.router import account, category, diagnostics, health, metrics, payee, transaction
 
 app = FastAPI()
+cache_listener = crud.CacheListener(engine)
 
 
 app.add_middleware(
@@ -13,15 +19,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+if settings.QUERY_LOG:
+    app.add_middleware(QueryLogMiddleware, repeat_threshold=settings.QUERY_LOG_REPEAT_THRESHOLD)
+# Not installed unless configured, so unprofiled requests pay nothing
+if settings.PROFILE_DIRECTORY is not None:
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=settings.PROFILE_DIRECTORY,
+        secret=settings.PROFILE_SECRET,
+        sample_rate=settings.PROFILE_SAMPLE_RATE,
+        interval_seconds=settings.PROFILE_INTERVAL_SECONDS,
+    )
+# Added last so it's the outermost middleware and times the whole request
+app.add_middleware(MetricsMiddleware)
 
 
 @app.on_event("startup")
 def on_startup():
-    create_database_and_tables()
+    if settings.DATABASE_MIGRATE_ON_STARTUP:
+        migration.migrate(engine)
+
+    if settings.CACHE_NOTIFY and settings.CACHE_MAX_SIZE > 0:
+        cache_listener.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    cache_listener.stop()
 
 
 app.include_router(account.router)
 app.include_router(payee.router)
 app.include_router(category.router)
 app.include_router(transaction.router)
+app.include_router(health.router)
+app.include_router(metrics.router)
+app.include_router(diagnostics.router)
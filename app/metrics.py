@@ -0,0 +1,197 @@
+import contextvars
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 7.5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 4, 5, 10, 20, 50, 100)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metric:
+    type_ = ""
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        metrics.append(self)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_}"]
+
+    def _format_labels(self, labels: tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels)]
+        if extra:
+            pairs.append(extra)
+
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Gauge(Metric):
+    type_ = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def add(self, value: float, labels: tuple[str, ...] = ()) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + value
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+
+        lines = super().render()
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{self._format_labels(labels)} {value}")
+
+        return lines
+
+
+class Histogram(Metric):
+    type_ = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = buckets
+        # Per label values: the count of each bucket (not cumulative), then the sum
+        self._values: dict[tuple[str, ...], tuple[list[int], float]] = {}
+
+    def observe(self, value: float, labels: tuple[str, ...] = ()) -> None:
+        with self._lock:
+            counts, total = self._values.get(labels, ([0] * (len(self.buckets) + 1), 0.0))
+            index = next(
+                (i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets)
+            )
+            counts[index] += 1
+            self._values[labels] = (counts, total + value)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = {
+                labels: (list(counts), total) for labels, (counts, total) in self._values.items()
+            }
+
+        lines = super().render()
+        for labels, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip([*self.buckets, "+Inf"], counts):
+                cumulative += count
+                bucket_labels = self._format_labels(labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{self._format_labels(labels)} {cumulative}")
+
+        return lines
+
+
+# What the database did for the current request, shared with the threadpool (and the greenlets
+# of async sessions) through the copied context
+class RequestStatistics:
+    def __init__(self):
+        self.statements = 0
+        self.database_seconds = 0.0
+
+
+metrics: list[Metric] = []
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Latency of HTTP requests, until the last byte of the response is sent",
+    ("method", "route", "status"),
+)
+requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests being handled")
+request_statements = Histogram(
+    "http_request_statements",
+    "SQL statements executed per HTTP request",
+    ("method", "route"),
+    STATEMENT_BUCKETS,
+)
+request_database_duration = Histogram(
+    "http_request_database_duration_seconds",
+    "Time spent executing SQL statements per HTTP request",
+    ("method", "route"),
+)
+_request_statistics: contextvars.ContextVar[Optional[RequestStatistics]] = contextvars.ContextVar(
+    "request_statistics", default=None
+)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        statistics = RequestStatistics()
+        token = _request_statistics.set(statistics)
+        requests_in_flight.add(1)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            requests_in_flight.add(-1)
+            _request_statistics.reset(token)
+
+            labels = (scope["method"], get_route(scope))
+            request_duration.observe(duration, (*labels, str(status_code)))
+            request_statements.observe(statistics.statements, labels)
+            request_database_duration.observe(statistics.database_seconds, labels)
+
+
+def render() -> str:
+    lines = [line for metric in metrics for line in metric.render()]
+
+    return "\n".join(lines) + "\n"
+
+
+# Labels requests with their route template, so ids in paths don't create new series
+def get_route(scope: Scope) -> str:
+    for route in scope["app"].routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+
+    return "unmatched"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+@event.listens_for(Engine, "before_cursor_execute", named=True)
+def _start_statement(conn, **_) -> None:
+    conn.info["statement_start"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute", named=True)
+def _end_statement(conn, **_) -> None:
+    statistics = _request_statistics.get()
+    if statistics is not None:
+        statistics.statements += 1
+        statistics.database_seconds += time.perf_counter() - conn.info["statement_start"]
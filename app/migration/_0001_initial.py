@@ -0,0 +1,51 @@
+from app.migration._migration import Migration
+
+# IF NOT EXISTS adopts databases created by `create_all` before migrations existed
+migration = Migration(
+    1,
+    "initial",
+    [
+        "CREATE TABLE IF NOT EXISTS account ("
+        "id SERIAL NOT NULL, "
+        "name VARCHAR NOT NULL, "
+        "PRIMARY KEY (id))",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_account_name ON account (name)",
+        "CREATE TABLE IF NOT EXISTS category ("
+        "id SERIAL NOT NULL, "
+        "name VARCHAR NOT NULL, "
+        "budget FLOAT NOT NULL, "
+        "PRIMARY KEY (id))",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_category_name ON category (name)",
+        "CREATE TABLE IF NOT EXISTS payee ("
+        "id SERIAL NOT NULL, "
+        "name VARCHAR NOT NULL, "
+        "PRIMARY KEY (id))",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_payee_name ON payee (name)",
+        "CREATE TABLE IF NOT EXISTS account_balance ("
+        "account_id INTEGER NOT NULL, "
+        "balance FLOAT NOT NULL, "
+        "PRIMARY KEY (account_id), "
+        "FOREIGN KEY (account_id) REFERENCES account (id) ON DELETE CASCADE)",
+        'CREATE TABLE IF NOT EXISTS "transaction" ('
+        "id SERIAL NOT NULL, "
+        "date_time TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+        "account_id INTEGER, "
+        "payee_id INTEGER, "
+        "category_id INTEGER, "
+        "value FLOAT NOT NULL, "
+        "comment VARCHAR, "
+        "PRIMARY KEY (id), "
+        "FOREIGN KEY (account_id) REFERENCES account (id), "
+        "FOREIGN KEY (payee_id) REFERENCES payee (id), "
+        "FOREIGN KEY (category_id) REFERENCES category (id))",
+        # Blocks transaction writes until the backfill commits, so none is missed. Balances
+        # already maintained by an existing `account_balance` are kept
+        'LOCK TABLE "transaction" IN SHARE MODE',
+        "INSERT INTO account_balance (account_id, balance) "
+        "SELECT account_id, sum(value) "
+        'FROM "transaction" '
+        "WHERE account_id IS NOT NULL "
+        "GROUP BY account_id "
+        "ON CONFLICT (account_id) DO NOTHING",
+    ],
+)
@@ -0,0 +1,24 @@
+from app.migration._migration import Migration
+
+INDEXES = {
+    "ix_transaction_account_id_date_time": "account_id, date_time",
+    "ix_transaction_payee_id_date_time": "payee_id, date_time",
+    "ix_transaction_category_id_date_time": "category_id, date_time",
+    "ix_transaction_date_time_id": "date_time, id",
+}
+
+# Built concurrently so live tables keep taking writes. A failed build leaves an invalid index
+# behind, so each one is dropped first when the migration runs again
+migration = Migration(
+    2,
+    "transaction_indexes",
+    [
+        statement
+        for name, columns in INDEXES.items()
+        for statement in [
+            f"DROP INDEX CONCURRENTLY IF EXISTS {name}",
+            f'CREATE INDEX CONCURRENTLY {name} ON "transaction" ({columns})',
+        ]
+    ],
+    transactional=False,
+)
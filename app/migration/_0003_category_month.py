@@ -0,0 +1,22 @@
+from app.migration._migration import Migration
+
+migration = Migration(
+    3,
+    "category_month",
+    [
+        "CREATE TABLE category_month ("
+        "category_id INTEGER NOT NULL, "
+        "month DATE NOT NULL, "
+        "expenditure FLOAT NOT NULL, "
+        "count INTEGER NOT NULL, "
+        "PRIMARY KEY (category_id, month), "
+        "FOREIGN KEY (category_id) REFERENCES category (id) ON DELETE CASCADE)",
+        # Blocks transaction writes until the backfill commits, so none is missed
+        'LOCK TABLE "transaction" IN SHARE MODE',
+        "INSERT INTO category_month (category_id, month, expenditure, count) "
+        "SELECT category_id, date_trunc('month', date_time)::date, sum(value), count(*) "
+        'FROM "transaction" '
+        "WHERE category_id IS NOT NULL "
+        "GROUP BY 1, 2",
+    ],
+)
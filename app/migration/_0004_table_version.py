@@ -0,0 +1,32 @@
+from app.migration._migration import Migration
+
+TABLES = ["account", "payee", "category", "transaction"]
+
+# Triggers are dropped first, since `create_all` may have created them already
+migration = Migration(
+    4,
+    "table_version",
+    [
+        "CREATE TABLE table_version ("
+        "name VARCHAR NOT NULL, "
+        "version BIGINT NOT NULL, "
+        "PRIMARY KEY (name))",
+        "CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger LANGUAGE plpgsql AS $$ "
+        "BEGIN "
+        "INSERT INTO table_version (name, version) VALUES (TG_TABLE_NAME, txid_current()) "
+        "ON CONFLICT (name) DO UPDATE SET version = excluded.version; "
+        "RETURN NULL; "
+        "END $$",
+        *[
+            statement
+            for table in TABLES
+            for statement in [
+                f'DROP TRIGGER IF EXISTS bump_table_version ON "{table}"',
+                "CREATE TRIGGER bump_table_version "
+                "AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE "
+                f'ON "{table}" '
+                "FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()",
+            ]
+        ],
+    ],
+)
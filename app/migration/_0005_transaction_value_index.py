@@ -0,0 +1,14 @@
+from app.migration._migration import Migration
+
+NAME = "ix_transaction_value_id"
+
+# Supports `GET /transaction/?sort=value`. Built concurrently like the other transaction indexes
+migration = Migration(
+    5,
+    "transaction_value_index",
+    [
+        f"DROP INDEX CONCURRENTLY IF EXISTS {NAME}",
+        f'CREATE INDEX CONCURRENTLY {NAME} ON "transaction" (value, id)',
+    ],
+    transactional=False,
+)
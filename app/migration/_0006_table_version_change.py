@@ -0,0 +1,35 @@
+from app.migration._migration import Migration
+
+TABLES = ["account", "payee", "category", "transaction"]
+
+# Writers no longer upsert one `table_version` row per table, which serialized them. Each write
+# adds a change row instead, folded into `table_version` by whichever writer isn't blocked
+migration = Migration(
+    6,
+    "table_version_change",
+    [
+        "CREATE TABLE table_version_change ("
+        "id BIGSERIAL NOT NULL, "
+        "name VARCHAR NOT NULL, "
+        "PRIMARY KEY (id))",
+        "CREATE INDEX ix_table_version_change_name ON table_version_change (name)",
+        "INSERT INTO table_version (name, version) VALUES "
+        + ", ".join(f"('{table}', 0)" for table in TABLES)
+        + " ON CONFLICT (name) DO NOTHING",
+        "CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger LANGUAGE plpgsql AS $$ "
+        "BEGIN "
+        "INSERT INTO table_version_change (name) VALUES (TG_TABLE_NAME); "
+        "PERFORM FROM table_version WHERE name = TG_TABLE_NAME FOR UPDATE SKIP LOCKED; "
+        "IF FOUND THEN "
+        "WITH folded AS ("
+        "DELETE FROM table_version_change WHERE id IN ("
+        "SELECT id FROM table_version_change WHERE name = TG_TABLE_NAME "
+        "FOR UPDATE SKIP LOCKED) "
+        "RETURNING id) "
+        "UPDATE table_version SET version = version + (SELECT count(*) FROM folded) "
+        "WHERE name = TG_TABLE_NAME; "
+        "END IF; "
+        "RETURN NULL; "
+        "END $$",
+    ],
+)
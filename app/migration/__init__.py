@@ -0,0 +1,27 @@
+from typing import Optional
+
+from sqlalchemy.engine import Engine
+
+from app.migration import (
+    _0001_initial,
+    _0002_transaction_indexes,
+    _0003_category_month,
+    _0004_table_version,
+    _0005_transaction_value_index,
+    _0006_table_version_change,
+)
+from app.migration._migration import Migration, get_applied_versions
+from app.migration._migration import migrate as _migrate
+
+migrations = [
+    _0001_initial.migration,
+    _0002_transaction_indexes.migration,
+    _0003_category_month.migration,
+    _0004_table_version.migration,
+    _0005_transaction_value_index.migration,
+    _0006_table_version_change.migration,
+]
+
+
+def migrate(engine: Engine, target: Optional[int] = None) -> list[Migration]:
+    return _migrate(engine, migrations, target)
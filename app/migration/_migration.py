@@ -0,0 +1,88 @@
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+LOCK_KEY = 1_977_283_945
+LOCK_POLL_SECONDS = 1.0
+
+
+class Migration:
+    # Non transactional migrations (e.g. `CREATE INDEX CONCURRENTLY`) run in autocommit mode, so
+    # their statements must be safe to run again after a partial failure
+    def __init__(self, version: int, name: str, statements: list[str], transactional: bool = True):
+        self.version = version
+        self.name = name
+        self.statements = statements
+        self.transactional = transactional
+
+
+def get_applied_versions(engine: Engine) -> set[int]:
+    with engine.begin() as connection:
+        _create_version_table(connection)
+        result = connection.execute(text("SELECT version FROM schema_migration"))
+        versions = set(result.scalars())
+
+    return versions
+
+
+# Applies the pending migrations in order and returns them. Concurrent callers (e.g. several
+# workers starting at once) wait for each other through an advisory lock
+def migrate(
+    engine: Engine, migrations: list[Migration], target: Optional[int] = None
+) -> list[Migration]:
+    with engine.connect() as lock_connection:
+        # Autocommit, so waiting for the lock doesn't hold a snapshot that concurrent index
+        # builds would wait for
+        lock_connection = lock_connection.execution_options(isolation_level="AUTOCOMMIT")
+        _lock(lock_connection)
+        try:
+            applied_versions = get_applied_versions(engine)
+            pending = [
+                migration
+                for migration in sorted(migrations, key=lambda migration: migration.version)
+                if migration.version not in applied_versions
+                and (target is None or migration.version <= target)
+            ]
+            for migration in pending:
+                _apply(engine, migration)
+        finally:
+            lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LOCK_KEY})
+
+    return pending
+
+
+def _create_version_table(connection: Connection) -> None:
+    connection.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS schema_migration ("
+            "version INTEGER PRIMARY KEY, "
+            "name VARCHAR NOT NULL, "
+            "applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now())"
+        )
+    )
+
+
+# Polls instead of blocking in `pg_advisory_lock`, which would hold a snapshot while waiting
+def _lock(connection: Connection) -> None:
+    while True:
+        result = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": LOCK_KEY})
+        if result.scalar():
+            return
+
+        time.sleep(LOCK_POLL_SECONDS)
+
+
+def _apply(engine: Engine, migration: Migration) -> None:
+    with engine.connect() as connection:
+        if not migration.transactional:
+            connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+
+        with connection.begin():
+            for statement in migration.statements:
+                connection.execute(text(statement))
+            connection.execute(
+                text("INSERT INTO schema_migration (version, name) VALUES (:version, :name)"),
+                {"version": migration.version, "name": migration.name},
+            )
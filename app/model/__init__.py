@@ -1,16 +1,32 @@
 from app.model._account import AccountDatabase, AccountInput, AccountOutput, AccountUpdate
+from app.model._account_balance import AccountBalanceDatabase
 from app.model._category import CategoryDatabase, CategoryInput, CategoryOutput, CategoryUpdate
+from app.model._category_month import CategoryMonthDatabase
+from app.model._diagnostics import (
+    AllocationDiffOutput,
+    AllocationOutput,
+    MemoryStatusOutput,
+    RequestMemoryOutput,
+    SnapshotOutput,
+)
+from app.model._health import CacheOutput, PoolOutput, ReadinessOutput
 from app.model._model import ModelDatabase, ModelInput, ModelOutput, ModelUpdate
 from app.model._named_model import (
     NamedModelDatabase,
     NamedModelInput,
     NamedModelOutput,
     NamedModelUpdate,
+    NamedReferenceOutput,
 )
 from app.model._payee import PayeeDatabase, PayeeInput, PayeeOutput, PayeeUpdate
+from app.model._table_version import TableVersionChangeDatabase, TableVersionDatabase
 from app.model._transaction import (
+    TransactionBulkError,
+    TransactionBulkOutput,
     TransactionDatabase,
+    TransactionExpandedOutput,
     TransactionInput,
     TransactionOutput,
+    TransactionQuery,
     TransactionUpdate,
 )
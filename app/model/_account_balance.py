@@ -0,0 +1,12 @@
+from sqlalchemy import Column, ForeignKey, Integer
+from sqlmodel import Field, SQLModel
+
+
+# Maintained by `crud.transaction` writes so account reads don't aggregate `transaction`
+class AccountBalanceDatabase(SQLModel, table=True):
+    __tablename__ = "account_balance"
+
+    account_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("account.id", ondelete="CASCADE"), primary_key=True)
+    )
+    balance: float = 0
@@ -0,0 +1,17 @@
+from datetime import date
+
+from sqlalchemy import Column, ForeignKey, Integer
+from sqlmodel import Field, SQLModel
+
+
+# Maintained by `crud.transaction` writes so monthly category reads don't aggregate `transaction`.
+# `month` is the first day of the month
+class CategoryMonthDatabase(SQLModel, table=True):
+    __tablename__ = "category_month"
+
+    category_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("category.id", ondelete="CASCADE"), primary_key=True)
+    )
+    month: date = Field(primary_key=True)
+    expenditure: float = 0
+    count: int = 0
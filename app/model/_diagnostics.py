@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from sqlmodel import SQLModel
+
+
+class MemoryStatusOutput(SQLModel):
+    tracing: bool
+    current_bytes: int
+    peak_bytes: int
+    snapshot_ids: list[int]
+
+
+class SnapshotOutput(SQLModel):
+    id: int
+
+
+class AllocationOutput(SQLModel):
+    traceback: list[str]
+    size_bytes: int
+    count: int
+
+
+class AllocationDiffOutput(AllocationOutput):
+    size_diff_bytes: int
+    count_diff: int
+
+
+class RequestMemoryOutput(SQLModel):
+    method: str
+    route: str
+    time: datetime
+    peak_bytes: int
+    retained_bytes: int
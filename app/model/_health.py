@@ -0,0 +1,27 @@
+from sqlmodel import SQLModel
+
+
+class PoolOutput(SQLModel):
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+
+
+class ReadinessOutput(SQLModel):
+    database: str
+    pool: PoolOutput
+
+
+class CacheOutput(SQLModel):
+    name: str
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
@@ -1,6 +1,6 @@
 from typing import Optional
 
-from sqlmodel import Field
+from sqlmodel import Field, SQLModel
 
 from app.model._model import ModelDatabase, ModelInput, ModelOutput, ModelUpdate
 
@@ -17,5 +17,11 @@ class NamedModelOutput(ModelOutput):
     name: str
 
 
+# A row referenced by another one, embedded in its output
+class NamedReferenceOutput(SQLModel):
+    id: int
+    name: str
+
+
 class NamedModelUpdate(ModelUpdate):
     name: Optional[str] = None
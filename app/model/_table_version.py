@@ -0,0 +1,67 @@
+from typing import Optional
+
+from sqlalchemy import DDL, BigInteger, Column, event
+from sqlmodel import Field, SQLModel
+
+VERSIONED_TABLES = ["account", "payee", "category", "transaction"]
+# Writers only insert their own change row, and fold committed ones into `table_version` when no
+# other writer is doing so, so no writer waits on another
+BUMP_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO table_version_change (name) VALUES (TG_TABLE_NAME);
+    PERFORM FROM table_version WHERE name = TG_TABLE_NAME FOR UPDATE SKIP LOCKED;
+    IF FOUND THEN
+        WITH folded AS (
+            DELETE FROM table_version_change WHERE id IN (
+                SELECT id FROM table_version_change WHERE name = TG_TABLE_NAME
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id
+        )
+        UPDATE table_version SET version = version + (SELECT count(*) FROM folded)
+        WHERE name = TG_TABLE_NAME;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+BUMP_TRIGGER = """
+DROP TRIGGER IF EXISTS bump_table_version ON "{table}";
+CREATE TRIGGER bump_table_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "{table}"
+FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+"""
+INSERT_VERSIONS = """
+INSERT INTO table_version (name, version) VALUES {values} ON CONFLICT (name) DO NOTHING
+"""
+
+
+# The version of a table is its `version` plus its rows in `table_version_change`, which a
+# statement trigger on each of `VERSIONED_TABLES` adds on every write, including cascades and
+# COPY. It grows when any write commits, whatever the order writers commit in
+class TableVersionDatabase(SQLModel, table=True):
+    __tablename__ = "table_version"
+
+    name: str = Field(primary_key=True)
+    version: int = Field(sa_column=Column(BigInteger, nullable=False))
+
+
+class TableVersionChangeDatabase(SQLModel, table=True):
+    __tablename__ = "table_version_change"
+
+    id: Optional[int] = Field(
+        default=None, sa_column=Column(BigInteger, primary_key=True, autoincrement=True)
+    )
+    name: str = Field(index=True)
+
+
+# Created by `app.migration`, declared here so `create_all` matches the migrated schema
+event.listen(
+    SQLModel.metadata,
+    "after_create",
+    DDL(INSERT_VERSIONS.format(values=", ".join(f"('{table}', 0)" for table in VERSIONED_TABLES))),
+)
+event.listen(SQLModel.metadata, "after_create", DDL(BUMP_FUNCTION))
+for table in VERSIONED_TABLES:
+    event.listen(SQLModel.metadata, "after_create", DDL(BUMP_TRIGGER.format(table=table)))
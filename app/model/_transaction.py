@@ -1,9 +1,11 @@
 from datetime import datetime
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Literal, Optional
 
-from sqlmodel import Field, Relationship
+from sqlalchemy import Index
+from sqlmodel import Field, Relationship, SQLModel
 
 from app.model._model import ModelDatabase, ModelInput, ModelOutput, ModelUpdate
+from app.model._named_model import NamedReferenceOutput
 
 if TYPE_CHECKING:
     from app.model._account import AccountDatabase
@@ -22,6 +24,14 @@ class TransactionInput(ModelInput):
 
 class TransactionDatabase(ModelDatabase, table=True):
     __tablename__ = "transaction"
+    # Created by `app.migration`, declared here so `create_all` matches the migrated schema
+    __table_args__ = (
+        Index("ix_transaction_account_id_date_time", "account_id", "date_time"),
+        Index("ix_transaction_payee_id_date_time", "payee_id", "date_time"),
+        Index("ix_transaction_category_id_date_time", "category_id", "date_time"),
+        Index("ix_transaction_date_time_id", "date_time", "id"),
+        Index("ix_transaction_value_id", "value", "id"),
+    )
 
     date_time: datetime = Field(default_factory=datetime.now)
     account_id: Optional[int] = Field(default=None, foreign_key="account.id")
@@ -44,6 +54,13 @@ class TransactionOutput(ModelOutput):
     comment: Optional[str] = None
 
 
+# With `expand`, the listed references are embedded in the output
+class TransactionExpandedOutput(TransactionOutput):
+    account: Optional[NamedReferenceOutput] = None
+    payee: Optional[NamedReferenceOutput] = None
+    category: Optional[NamedReferenceOutput] = None
+
+
 class TransactionUpdate(ModelUpdate):
     date_time: Optional[datetime] = None
     account_id: Optional[int] = None
@@ -51,3 +68,27 @@ class TransactionUpdate(ModelUpdate):
     category_id: Optional[int] = None
     value: Optional[float] = None
     comment: Optional[str] = None
+
+
+# Query parameters of `GET /transaction/`. Ranges are inclusive, `comment` matches
+# case-insensitive substrings and a leading "-" sorts descending
+class TransactionQuery(SQLModel):
+    account_id: Optional[int] = None
+    payee_id: Optional[int] = None
+    category_id: Optional[int] = None
+    date_time_from: Optional[datetime] = None
+    date_time_to: Optional[datetime] = None
+    value_min: Optional[float] = None
+    value_max: Optional[float] = None
+    comment: Optional[str] = None
+    sort: Literal["date_time", "-date_time", "value", "-value", "id", "-id"] = "date_time"
+
+
+class TransactionBulkError(SQLModel):
+    index: int
+    detail: str
+
+
+class TransactionBulkOutput(SQLModel):
+    created: int
+    errors: list[TransactionBulkError]
@@ -0,0 +1,133 @@
+import hashlib
+import hmac
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics import get_route
+
+HEADER = "X-Profile"
+MAX_SIGNATURE_AGE_SECONDS = 300
+
+
+# Samples the stacks of every thread, so work in the threadpool shows up too. Other requests
+# running at the same time are sampled as well
+class Sampler(threading.Thread):
+    def __init__(self, interval_seconds: float):
+        super().__init__(name="profiling-sampler", daemon=True)
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._thread_names: dict[int, str] = {}
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval_seconds):
+            # The only source of other threads' frames
+            frames = sys._current_frames()  # pylint: disable=protected-access
+            for thread_id, frame in frames.items():
+                if thread_id != self.ident:
+                    self.stacks[self._get_stack(thread_id, frame)] += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+    def _get_stack(self, thread_id: int, frame: Optional[FrameType]) -> str:
+        if thread_id not in self._thread_names:
+            self._thread_names = {
+                thread.ident: thread.name
+                for thread in threading.enumerate()
+                if thread.ident is not None
+            }
+
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            labels.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        labels.append(self._thread_names.get(thread_id, str(thread_id)))
+
+        return ";".join(reversed(labels))
+
+
+class ProfilingMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        directory: str,
+        secret: Optional[str],
+        sample_rate: float,
+        interval_seconds: float,
+    ):
+        self.app = app
+        self.directory = Path(directory)
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self.interval_seconds = interval_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._is_selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        route = re.sub(r"[^0-9A-Za-z]+", "_", get_route(scope)).strip("_") or "root"
+        timestamp = time.strftime("%Y%m%dT%H%M%S")
+        path = (
+            self.directory
+            / f"{timestamp}-{scope['method']}-{route}-{uuid.uuid4().hex[:8]}.collapsed"
+        )
+
+        async def send_with_header(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers[HEADER] = path.name
+            await send(message)
+
+        sampler = Sampler(self.interval_seconds)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            sampler.stop()
+            await run_in_threadpool(_write, path, sampler.stacks)
+
+    def _is_selected(self, scope: Scope) -> bool:
+        signature = Headers(scope=scope).get(HEADER)
+        if signature is not None and self.secret is not None:
+            return verify(signature, self.secret, time.time())
+
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+
+# Signatures are `<unix time>:<HMAC-SHA256 of the time>`, so they expire
+def sign(secret: str, timestamp: int) -> str:
+    digest = hmac.new(secret.encode(), str(timestamp).encode(), hashlib.sha256).hexdigest()
+
+    return f"{timestamp}:{digest}"
+
+
+def verify(signature: str, secret: str, now: float) -> bool:
+    timestamp, _, _ = signature.partition(":")
+    if not timestamp.isdigit() or abs(now - int(timestamp)) > MAX_SIGNATURE_AGE_SECONDS:
+        return False
+
+    return hmac.compare_digest(signature, sign(secret, int(timestamp)))
+
+
+# Writes the collapsed stack format read by `flamegraph.pl`, speedscope and similar tools
+def _write(path: Path, stacks: Counter[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = [f"{stack} {count}\n" for stack, count in sorted(stacks.items())]
+    path.write_text("".join(lines))
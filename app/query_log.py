@@ -0,0 +1,105 @@
+import contextvars
+import logging
+import time
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.metrics import get_route
+
+MAX_PARAMETERS_LENGTH = 1000
+MAX_STATEMENT_LENGTH = 500
+
+logger = logging.getLogger(__name__)
+
+
+# The statements of the current request, by text. Statements are compiled with bound
+# parameters, so the text is the statement's shape
+class RequestQueries:
+    def __init__(self, method: str, route: str):
+        self.method = method
+        self.route = route
+        self.statements: Counter[str] = Counter()
+
+
+_request_queries: contextvars.ContextVar[Optional[RequestQueries]] = contextvars.ContextVar(
+    "request_queries", default=None
+)
+
+
+class QueryLogMiddleware:
+    def __init__(self, app: ASGIApp, repeat_threshold: int):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries(scope["method"], get_route(scope))
+        token = _request_queries.set(queries)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_queries.reset(token)
+            if self.repeat_threshold:
+                _log_repeated(queries, self.repeat_threshold)
+
+
+# Logs statements slower than `slow_seconds`, and counts the statements of each request for
+# `QueryLogMiddleware` to flag N+1 patterns
+def instrument(engine: Engine, slow_seconds: float) -> None:
+    @event.listens_for(engine, "before_cursor_execute", named=True)
+    def start_statement(conn, **_) -> None:
+        conn.info["query_log_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute", named=True)
+    def end_statement(conn, statement, parameters, **_) -> None:
+        duration = time.perf_counter() - conn.info["query_log_start"]
+        queries = _request_queries.get()
+        if queries is not None:
+            queries.statements[statement] += 1
+
+        if duration >= slow_seconds:
+            location = (
+                "outside requests" if queries is None else f"{queries.method} {queries.route}"
+            )
+            logger.warning(
+                "Slow query (%.3f s) %s: %s; parameters: %s",
+                duration,
+                location,
+                _truncate(statement, MAX_STATEMENT_LENGTH),
+                _truncate(repr(parameters), MAX_PARAMETERS_LENGTH),
+            )
+
+
+def _log_repeated(queries: RequestQueries, repeat_threshold: int) -> None:
+    repeated = [
+        (count, statement)
+        for statement, count in queries.statements.most_common()
+        if count >= repeat_threshold
+    ]
+    if not repeated:
+        return
+
+    summary = "".join(
+        f"\n  {count} times: {_truncate(statement, MAX_STATEMENT_LENGTH)}"
+        for count, statement in repeated
+    )
+    logger.warning(
+        "Possible N+1 queries in %s %s (%d statements):%s",
+        queries.method,
+        queries.route,
+        sum(queries.statements.values()),
+        summary,
+    )
+
+
+def _truncate(text: str, length: int) -> str:
+    text = " ".join(text.split())
+
+    return text if len(text) <= length else text[: length - 3] + "..."
@@ -0,0 +1,44 @@
+from typing import Any, Iterable, Type
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from sqlmodel import SQLModel
+
+
+# Encodes rows (ORM objects or Core rows) straight to JSON with orjson, picking the fields of
+# `model_output` without validating them. Handlers still declare `response_model` for the OpenAPI
+# schema; FastAPI skips it for returned responses, so `response`'s headers are copied over.
+# Each name in `expand` embeds the reference selected as `<name>_id` and `<name>_name` columns
+def encode_rows(
+    rows: Iterable[Any],
+    model_output: Type[SQLModel],
+    response: Response,
+    expand: Iterable[str] = (),
+) -> ORJSONResponse:
+    fields = list(model_output.__fields__)
+    expand = list(expand)
+    if expand:
+        content = [_encode_row(row, fields, expand) for row in rows]
+    else:
+        content = [{field: getattr(row, field) for field in fields} for row in rows]
+    encoded_response = ORJSONResponse(content, headers=dict(response.headers))
+
+    return encoded_response
+
+
+def encode_row(
+    row: Any, model_output: Type[SQLModel], response: Response, expand: Iterable[str] = ()
+) -> ORJSONResponse:
+    content = _encode_row(row, list(model_output.__fields__), list(expand))
+    encoded_response = ORJSONResponse(content, headers=dict(response.headers))
+
+    return encoded_response
+
+
+def _encode_row(row: Any, fields: list[str], expand: list[str]) -> dict[str, Any]:
+    content = {field: getattr(row, field) for field in fields}
+    for name in expand:
+        id_ = getattr(row, f"{name}_id")
+        content[name] = None if id_ is None else {"id": id_, "name": getattr(row, f"{name}_name")}
+
+    return content
@@ -1,9 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.engine import Row
 from sqlalchemy.exc import IntegrityError
-from sqlmodel import Session
 
 from app import crud, model
-from app.dependency import ExistentIdChecker, get_session
+from app.database import AnySession, run
+from app.dependency import (
+    CursorDecoder,
+    ETagChecker,
+    RowLoader,
+    check_ids,
+    decode_ids,
+    decode_month,
+    get_session,
+    record_memory,
+)
+from app.response import encode_rows
 
 router = APIRouter(
     prefix="/category",
@@ -11,53 +25,87 @@ router = APIRouter(
     responses={status.HTTP_404_NOT_FOUND: {"description": "Not found"}},
 )
 
-check_existent_id = ExistentIdChecker("Category", crud.category)
+load_full_row = RowLoader("Category", crud.category.get_full)
+decode_cursor = CursorDecoder(crud.category)
+check_etag = ETagChecker(crud.category.version_names)
 
 
 @router.post("/", response_model=model.CategoryOutput)
-def create(*, session: Session = Depends(get_session), input_: model.CategoryInput):
+async def create(*, session: AnySession = Depends(get_session), input_: model.CategoryInput):
     try:
-        row = crud.category.create(session, input_)
+        full_row = await run(session, crud.category.create_full, input_)
     except IntegrityError as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Name already registered"
         ) from exc
 
-    full_row = crud.category.get_full(session, row.id)
+    return full_row
+
 
+@router.get("/{id_}", response_model=model.CategoryOutput, dependencies=[Depends(check_etag)])
+async def read(*, full_row: Row = Depends(load_full_row)):
     return full_row
 
 
-@router.get("/{id_}", response_model=model.CategoryOutput)
-def read(*, session: Session = Depends(get_session), id_: int = Depends(check_existent_id)):
-    full_row = crud.category.get_full(session, id_)
+@router.get(
+    "/",
+    response_model=list[model.CategoryOutput],
+    dependencies=[Depends(record_memory), Depends(check_etag)],
+)
+async def read_many(
+    *,
+    session: AnySession = Depends(get_session),
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[tuple] = Depends(decode_cursor),
+    ids: Optional[list[int]] = Depends(decode_ids),
+    month: Optional[date] = Depends(decode_month)
+):
+    if ids is not None:
+        full_rows = await run(session, crud.category.get_full_by_ids, ids)
 
-    return full_row
+        return encode_rows(full_rows, model.CategoryOutput, response)
+
+    if month is None:
+        full_rows = await run(session, crud.category.get_many_full, skip, limit, after)
+    else:
+        full_rows = await run(
+            session, crud.category.get_many_month, month, skip, limit, after=after
+        )
+    if full_rows and len(full_rows) == limit:
+        response.headers["X-Next-Cursor"] = crud.category.encode_cursor(full_rows[-1])
+
+    return encode_rows(full_rows, model.CategoryOutput, response)
 
 
-@router.get("/", response_model=list[model.CategoryOutput])
-def read_many(*, session: Session = Depends(get_session), skip: int = 0, limit: int = 100):
-    full_rows = crud.category.get_many_full(session, skip, limit)
+@router.post("/batch", response_model=list[model.CategoryOutput])
+async def read_batch(
+    *,
+    session: AnySession = Depends(get_session),
+    response: Response,
+    ids: list[int] = Depends(check_ids)
+):
+    full_rows = await run(session, crud.category.get_full_by_ids, ids)
 
-    return full_rows
+    return encode_rows(full_rows, model.CategoryOutput, response)
 
 
 @router.put("/{id_}", response_model=model.CategoryOutput)
-def update(
-    *,
-    session: Session = Depends(get_session),
-    id_: int = Depends(check_existent_id),
-    update_: model.CategoryUpdate
+async def update(
+    *, session: AnySession = Depends(get_session), id_: int, update_: model.CategoryUpdate
 ):
-    row = crud.category.update(session, id_, update_)
-    full_row = crud.category.get_full(session, row.id)
+    full_row = await run(session, crud.category.update_full, id_, update_)
+    if full_row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
 
     return full_row
 
 
 @router.delete("/{id_}", response_model=model.CategoryOutput)
-def delete(*, session: Session = Depends(get_session), id_: int = Depends(check_existent_id)):
-    full_row = crud.category.get_full(session, id_)
-    crud.category.delete(session, id_)
+async def delete(*, session: AnySession = Depends(get_session), id_: int):
+    full_row = await run(session, crud.category.delete_full, id_)
+    if full_row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
 
     return full_row
@@ -0,0 +1,131 @@
+import tracemalloc
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+
+from app import model
+from app.dependency import check_admin
+from app.diagnostics import memory
+
+router = APIRouter(
+    prefix="/diagnostics",
+    tags=["diagnostics"],
+    dependencies=[Depends(check_admin)],
+    responses={status.HTTP_403_FORBIDDEN: {"description": "Invalid admin token"}},
+)
+
+KeyType = Literal["lineno", "filename", "traceback"]
+
+
+@router.get("/memory", response_model=model.MemoryStatusOutput)
+async def read_memory():
+    return _get_status()
+
+
+@router.post("/memory/start", response_model=model.MemoryStatusOutput)
+async def start_memory(*, frames: int = Query(1, ge=1, le=100)):
+    memory.start(frames)
+
+    return _get_status()
+
+
+@router.post("/memory/stop", response_model=model.MemoryStatusOutput)
+async def stop_memory():
+    memory.stop()
+
+    return _get_status()
+
+
+@router.post(
+    "/memory/snapshot",
+    response_model=model.SnapshotOutput,
+    responses={status.HTTP_409_CONFLICT: {"description": "Not tracing"}},
+)
+async def create_snapshot():
+    if not tracemalloc.is_tracing():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Not tracing")
+
+    id_ = await run_in_threadpool(memory.take_snapshot)
+
+    return model.SnapshotOutput(id=id_)
+
+
+@router.get(
+    "/memory/snapshot/{id_}",
+    response_model=list[model.AllocationOutput],
+    responses={status.HTTP_404_NOT_FOUND: {"description": "Not found"}},
+)
+async def read_snapshot(
+    *, id_: int, key_type: KeyType = "lineno", limit: int = Query(20, ge=1, le=1000)
+):
+    statistics = await run_in_threadpool(memory.get_statistics, id_, key_type, limit)
+    if statistics is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Snapshot not found")
+
+    outputs = [
+        model.AllocationOutput(
+            traceback=[str(frame) for frame in statistic.traceback],
+            size_bytes=statistic.size,
+            count=statistic.count,
+        )
+        for statistic in statistics
+    ]
+
+    return outputs
+
+
+# The allocations that grew (or shrank) the most from snapshot `id_` to snapshot `other_id`
+@router.get(
+    "/memory/snapshot/{id_}/diff/{other_id}",
+    response_model=list[model.AllocationDiffOutput],
+    responses={status.HTTP_404_NOT_FOUND: {"description": "Not found"}},
+)
+async def read_snapshot_diff(
+    *, id_: int, other_id: int, key_type: KeyType = "lineno", limit: int = Query(20, ge=1, le=1000)
+):
+    statistic_diffs = await run_in_threadpool(memory.compare, id_, other_id, key_type, limit)
+    if statistic_diffs is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Snapshot not found")
+
+    outputs = [
+        model.AllocationDiffOutput(
+            traceback=[str(frame) for frame in statistic_diff.traceback],
+            size_bytes=statistic_diff.size,
+            count=statistic_diff.count,
+            size_diff_bytes=statistic_diff.size_diff,
+            count_diff=statistic_diff.count_diff,
+        )
+        for statistic_diff in statistic_diffs
+    ]
+
+    return outputs
+
+
+@router.get("/memory/request", response_model=list[model.RequestMemoryOutput])
+async def read_request_memory():
+    outputs = [
+        model.RequestMemoryOutput(
+            method=request.method,
+            route=request.route,
+            time=datetime.fromtimestamp(request.time),
+            peak_bytes=request.peak_bytes,
+            retained_bytes=request.retained_bytes,
+        )
+        for request in memory.get_requests()
+    ]
+
+    return outputs
+
+
+def _get_status() -> model.MemoryStatusOutput:
+    current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    status_ = model.MemoryStatusOutput(
+        tracing=tracemalloc.is_tracing(),
+        current_bytes=current_bytes,
+        peak_bytes=peak_bytes,
+        snapshot_ids=memory.get_snapshot_ids(),
+    )
+
+    return status_
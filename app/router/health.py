@@ -0,0 +1,60 @@
+from typing import cast
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import DBAPIError
+
+from app import crud, model
+from app.database import AnySession, MeasuredQueuePool, get_session, ping, run, session_engine
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get(
+    "/ready",
+    response_model=model.ReadinessOutput,
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "Database unavailable"}},
+)
+async def read_readiness(*, session: AnySession = Depends(get_session)):
+    try:
+        await run(session, ping)
+    except DBAPIError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database unavailable"
+        ) from exc
+
+    # Both engines are created with a `MeasuredQueuePool` (or its async variant)
+    pool = cast(MeasuredQueuePool, session_engine.pool)
+    statistics = pool.statistics
+    readiness = model.ReadinessOutput(
+        database="ok",
+        pool=model.PoolOutput(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            checkouts=statistics.checkouts,
+            timeouts=statistics.timeouts,
+            wait_seconds_total=statistics.wait_seconds_total,
+            wait_seconds_max=statistics.wait_seconds_max,
+        ),
+    )
+
+    return readiness
+
+
+@router.get("/cache", response_model=list[model.CacheOutput])
+async def read_cache():
+    outputs = [
+        model.CacheOutput(
+            name=cache.name,
+            size=len(cache),
+            max_size=cache.max_size,
+            hits=cache.hits,
+            misses=cache.misses,
+            evictions=cache.evictions,
+            invalidations=cache.invalidations,
+        )
+        for cache in crud.caches
+    ]
+
+    return outputs
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    response = PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+    return response
@@ -1,9 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.engine import Row
 from sqlalchemy.exc import IntegrityError
-from sqlmodel import Session
 
 from app import crud, model
-from app.dependency import ExistentIdChecker, get_session
+from app.database import AnySession, run
+from app.dependency import (
+    CursorDecoder,
+    ETagChecker,
+    RowLoader,
+    check_ids,
+    decode_ids,
+    get_session,
+    record_memory,
+)
+from app.response import encode_rows
 
 router = APIRouter(
     prefix="/payee",
@@ -11,53 +23,81 @@ router = APIRouter(
     responses={status.HTTP_404_NOT_FOUND: {"description": "Not found"}},
 )
 
-check_existent_id = ExistentIdChecker("Payee", crud.payee)
+load_full_row = RowLoader("Payee", crud.payee.get_full)
+decode_cursor = CursorDecoder(crud.payee)
+check_etag = ETagChecker(crud.payee.version_names)
 
 
 @router.post("/", response_model=model.PayeeOutput)
-def create(*, session: Session = Depends(get_session), input_: model.PayeeInput):
+async def create(*, session: AnySession = Depends(get_session), input_: model.PayeeInput):
     try:
-        row = crud.payee.create(session, input_)
+        full_row = await run(session, crud.payee.create_full, input_)
     except IntegrityError as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Name already registered"
         ) from exc
 
-    full_row = crud.payee.get_full(session, row.id)
+    return full_row
+
 
+@router.get("/{id_}", response_model=model.PayeeOutput, dependencies=[Depends(check_etag)])
+async def read(*, full_row: Row = Depends(load_full_row)):
     return full_row
 
 
-@router.get("/{id_}", response_model=model.PayeeOutput)
-def read(*, session: Session = Depends(get_session), id_: int = Depends(check_existent_id)):
-    full_row = crud.payee.get_full(session, id_)
+@router.get(
+    "/",
+    response_model=list[model.PayeeOutput],
+    dependencies=[Depends(record_memory), Depends(check_etag)],
+)
+async def read_many(
+    *,
+    session: AnySession = Depends(get_session),
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[tuple] = Depends(decode_cursor),
+    ids: Optional[list[int]] = Depends(decode_ids)
+):
+    if ids is not None:
+        full_rows = await run(session, crud.payee.get_full_by_ids, ids)
 
-    return full_row
+        return encode_rows(full_rows, model.PayeeOutput, response)
+
+    full_rows = await run(session, crud.payee.get_many_full, skip, limit, after)
+    if full_rows and len(full_rows) == limit:
+        response.headers["X-Next-Cursor"] = crud.payee.encode_cursor(full_rows[-1])
+
+    return encode_rows(full_rows, model.PayeeOutput, response)
 
 
-@router.get("/", response_model=list[model.PayeeOutput])
-def read_many(*, session: Session = Depends(get_session), skip: int = 0, limit: int = 100):
-    full_rows = crud.payee.get_many_full(session, skip, limit)
+@router.post("/batch", response_model=list[model.PayeeOutput])
+async def read_batch(
+    *,
+    session: AnySession = Depends(get_session),
+    response: Response,
+    ids: list[int] = Depends(check_ids)
+):
+    full_rows = await run(session, crud.payee.get_full_by_ids, ids)
 
-    return full_rows
+    return encode_rows(full_rows, model.PayeeOutput, response)
 
 
 @router.put("/{id_}", response_model=model.PayeeOutput)
-def update(
-    *,
-    session: Session = Depends(get_session),
-    id_: int = Depends(check_existent_id),
-    update_: model.PayeeUpdate
+async def update(
+    *, session: AnySession = Depends(get_session), id_: int, update_: model.PayeeUpdate
 ):
-    row = crud.payee.update(session, id_, update_)
-    full_row = crud.payee.get_full(session, row.id)
+    full_row = await run(session, crud.payee.update_full, id_, update_)
+    if full_row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payee not found")
 
     return full_row
 
 
 @router.delete("/{id_}", response_model=model.PayeeOutput)
-def delete(*, session: Session = Depends(get_session), id_: int = Depends(check_existent_id)):
-    full_row = crud.payee.get_full(session, id_)
-    crud.payee.delete(session, id_)
+async def delete(*, session: AnySession = Depends(get_session), id_: int):
+    full_row = await run(session, crud.payee.delete_full, id_)
+    if full_row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payee not found")
 
     return full_row
@@ -1,8 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import validate_model  # pylint: disable=no-name-in-module  # Compiled module
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session
 
 from app import crud, model
-from app.dependency import ExistentIdChecker, get_session
+from app.database import AnySession, run
+from app.dependency import (
+    CursorDecoder,
+    ETagChecker,
+    ExpandDecoder,
+    check_ids,
+    decode_ids,
+    get_session,
+    record_memory,
+)
+from app.response import encode_row, encode_rows
 
 router = APIRouter(
     prefix="/transaction",
@@ -10,53 +30,314 @@ router = APIRouter(
     responses={status.HTTP_404_NOT_FOUND: {"description": "Not found"}},
 )
 
-check_existent_id = ExistentIdChecker("Transaction", crud.transaction)
+decode_cursor = CursorDecoder(crud.transaction)
+decode_expand = ExpandDecoder(["account", "payee", "category"])
+# Expanded responses embed the names of the referenced rows
+check_etag = ETagChecker(["transaction", "account", "payee", "category"])
+
+REFERENCE_DETAILS = {
+    "account_id": "Account not found",
+    "payee_id": "Payee not found",
+    "category_id": "Category not found",
+}
+INVALID_JSON = object()
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_FIELDS = list(model.TransactionOutput.__fields__)
 
 
 @router.post("/", response_model=model.TransactionOutput)
-def create(*, session: Session = Depends(get_session), input_: model.TransactionInput):
-    if not crud.account.is_in_database(session, input_.account_id, none_ok=True):
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found")
+async def create(*, session: AnySession = Depends(get_session), input_: model.TransactionInput):
+    row = await run(session, _create, input_)
 
-    if not crud.payee.is_in_database(session, input_.payee_id, none_ok=True):
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payee not found")
+    return row
 
-    if not crud.category.is_in_database(session, input_.category_id, none_ok=True):
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
 
-    row = crud.transaction.create(session, input_)
+@router.post(
+    "/bulk",
+    response_model=model.TransactionBulkOutput,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "type": "array",
+                        "items": {"$ref": "#/components/schemas/TransactionInput"},
+                    }
+                },
+                "application/x-ndjson": {
+                    "schema": {"$ref": "#/components/schemas/TransactionInput"}
+                },
+            },
+        }
+    },
+)
+async def create_many(*, session: AnySession = Depends(get_session), request: Request):
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("application/x-ndjson"):
+        items = _parse_ndjson(body)
+    else:
+        items = _parse_json_array(body)
 
-    return row
+    output = await run(session, _create_many, items)
 
+    return output
 
-@router.get("/{id_}", response_model=model.TransactionOutput)
-def read(*, session: Session = Depends(get_session), id_: int = Depends(check_existent_id)):
-    row = crud.transaction.get(session, id_)
 
-    return row
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()}
+        }
+    },
+)
+async def export(
+    *,
+    session: AnySession = Depends(get_session),
+    format_: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+):
+    batches = crud.transaction.stream(session)
+    if format_ == "csv":
+        content = _encode_csv(batches)
+    else:
+        content = _encode_ndjson(batches)
+
+    response = StreamingResponse(
+        content,
+        media_type=EXPORT_MEDIA_TYPES[format_],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format_}"'},
+    )
+
+    return response
 
 
-@router.get("/", response_model=list[model.TransactionOutput])
-def read_many(*, session: Session = Depends(get_session), skip: int = 0, limit: int = 100):
-    rows = crud.transaction.get_many(session, skip, limit)
+@router.get(
+    "/{id_}", response_model=model.TransactionExpandedOutput, dependencies=[Depends(check_etag)]
+)
+async def read(
+    *,
+    session: AnySession = Depends(get_session),
+    response: Response,
+    id_: int,
+    expand: list[str] = Depends(decode_expand),
+):
+    row = await run(session, crud.transaction.get_row, id_, expand)
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
 
-    return rows
+    return encode_row(row, model.TransactionOutput, response, expand)
 
 
-@router.put("/{id_}", response_model=model.TransactionOutput)
-def update(
+@router.get(
+    "/",
+    response_model=list[model.TransactionExpandedOutput],
+    dependencies=[Depends(record_memory), Depends(check_etag)],
+)
+async def read_many(
+    *,
+    session: AnySession = Depends(get_session),
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    query: model.TransactionQuery = Depends(),
+    ids: Optional[list[int]] = Depends(decode_ids),
+    expand: list[str] = Depends(decode_expand),
+):
+    if ids is not None:
+        rows = await run(session, crud.transaction.get_rows_by_ids, ids, expand)
+
+        return encode_rows(rows, model.TransactionOutput, response, expand)
+
+    keyset = crud.transaction.get_sort_keyset(query.sort)
+    after_values = None if after is None else decode_cursor.decode(after, keyset)
+    rows = await run(
+        session,
+        crud.transaction.get_many_rows,
+        skip,
+        limit,
+        after_values,
+        expand=expand,
+        query=query,
+    )
+    if rows and len(rows) == limit:
+        response.headers["X-Next-Cursor"] = crud.transaction.encode_cursor(rows[-1], keyset)
+
+    return encode_rows(rows, model.TransactionOutput, response, expand)
+
+
+@router.post("/batch", response_model=list[model.TransactionExpandedOutput])
+async def read_batch(
     *,
-    session: Session = Depends(get_session),
-    id_: int = Depends(check_existent_id),
-    update_: model.TransactionUpdate
+    session: AnySession = Depends(get_session),
+    response: Response,
+    ids: list[int] = Depends(check_ids),
+    expand: list[str] = Depends(decode_expand),
 ):
-    row = crud.transaction.update(session, id_, update_)
+    rows = await run(session, crud.transaction.get_rows_by_ids, ids, expand)
+
+    return encode_rows(rows, model.TransactionOutput, response, expand)
+
+
+@router.put("/{id_}", response_model=model.TransactionOutput)
+async def update(
+    *, session: AnySession = Depends(get_session), id_: int, update_: model.TransactionUpdate
+):
+    row = await run(session, _update, id_, update_)
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
 
     return row
 
 
 @router.delete("/{id_}", response_model=model.TransactionOutput)
-def delete(*, session: Session = Depends(get_session), id_: int = Depends(check_existent_id)):
-    row = crud.transaction.delete(session, id_)
+async def delete(*, session: AnySession = Depends(get_session), id_: int):
+    row = await run(session, crud.transaction.delete, id_)
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
 
     return row
+
+
+def _parse_json_array(body: bytes) -> list[tuple[int, Any]]:
+    try:
+        items = json.loads(body)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON body"
+        ) from exc
+
+    if not isinstance(items, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a JSON array")
+
+    return list(enumerate(items))
+
+
+def _parse_ndjson(body: bytes) -> list[tuple[int, Any]]:
+    items = []
+    for index, line in enumerate(body.splitlines()):
+        if not line.strip():
+            continue
+
+        try:
+            items.append((index, json.loads(line)))
+        except ValueError:
+            items.append((index, INVALID_JSON))
+
+    return items
+
+
+def _create_many(session: Session, items: list[tuple[int, Any]]) -> model.TransactionBulkOutput:
+    errors = []
+    indexed_data_news = []
+    for index, item in items:
+        if item is INVALID_JSON:
+            errors.append(model.TransactionBulkError(index=index, detail="Invalid JSON"))
+            continue
+
+        if not isinstance(item, dict):
+            errors.append(model.TransactionBulkError(index=index, detail="Expected a JSON object"))
+            continue
+
+        # Validate without building a model instance per row, which dominates large imports
+        data_new, _, exc = validate_model(model.TransactionInput, item)
+        if exc is not None:
+            detail = "; ".join(
+                f"{'.'.join(str(location) for location in error['loc'])}: {error['msg']}"
+                for error in exc.errors()
+            )
+            errors.append(model.TransactionBulkError(index=index, detail=detail))
+            continue
+
+        indexed_data_news.append((index, data_new))
+
+    missing_references = crud.transaction.get_missing_references(
+        session, (data_new for _, data_new in indexed_data_news)
+    )
+    data_news: list[dict[str, Any]] = []
+    for index, data_new in indexed_data_news:
+        reference_detail = _get_reference_detail(data_new, missing_references)
+        if reference_detail is not None:
+            errors.append(model.TransactionBulkError(index=index, detail=reference_detail))
+            continue
+
+        data_news.append(data_new)
+
+    created = crud.transaction.create_many(session, data_news)
+    errors.sort(key=lambda error: error.index)
+
+    return model.TransactionBulkOutput(created=created, errors=errors)
+
+
+async def _encode_ndjson(batches: AsyncIterator[list[Row]]) -> AsyncIterator[str]:
+    async for batch in batches:
+        yield "".join(
+            json.dumps(
+                {field: getattr(row, field) for field in EXPORT_FIELDS}, default=_encode_datetime
+            )
+            + "\n"
+            for row in batch
+        )
+
+
+async def _encode_csv(batches: AsyncIterator[list[Row]]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    async for batch in batches:
+        writer.writerows(
+            [_encode_datetime(getattr(row, field)) for field in EXPORT_FIELDS] for row in batch
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _encode_datetime(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+
+    return value
+
+
+# References are checked only after the write fails on a foreign key, so valid writes stay a
+# single statement
+def _create(session: Session, input_: model.TransactionInput) -> model.TransactionDatabase:
+    try:
+        return crud.transaction.create(session, input_)
+    except IntegrityError:
+        session.rollback()
+        _check_references(session, input_.dict())
+        raise
+
+
+def _update(session: Session, id_: int, update_: model.TransactionUpdate) -> Optional[Row]:
+    try:
+        return crud.transaction.update(session, id_, update_)
+    except IntegrityError:
+        session.rollback()
+        _check_references(session, update_.dict(exclude_unset=True))
+        raise
+
+
+def _check_references(session: Session, data_new: dict[str, Any]) -> None:
+    missing_references = crud.transaction.get_missing_references(session, [data_new])
+    detail = _get_reference_detail(data_new, missing_references)
+    if detail is not None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+
+
+def _get_reference_detail(
+    data_new: dict[str, Any], missing_references: dict[str, set[int]]
+) -> Optional[str]:
+    for column, detail in REFERENCE_DETAILS.items():
+        if data_new.get(column) in missing_references[column]:
+            return detail
+
+    return None
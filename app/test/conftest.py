@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.engine.create import URL
+
+from app import crud
+from app.config import settings
+
+
+@pytest.fixture(name="database_url")
+def database_url_fixture():
+    database_url = URL.create(
+        drivername="postgresql",
+        username=settings.DATABASE_USERNAME,
+        password=settings.DATABASE_PASSWORD,
+        host=settings.DATABASE_FQDN,
+        port=5432,
+        database="test",
+    )
+
+    return database_url
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(database_url: URL):
+    engine = create_engine(database_url)
+
+    SQLModel.metadata.drop_all(bind=engine)
+    SQLModel.metadata.create_all(bind=engine)
+    for cache in crud.caches:
+        cache.clear()
+
+    yield engine
+
+    for cache in crud.caches:
+        cache.clear()
+    engine.dispose()
+
+
+@pytest.fixture(name="session")
+def session_fixture(engine: Engine):
+    with Session(engine) as session:
+        yield session
@@ -1,33 +1,15 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import Session, SQLModel, create_engine
-from sqlmodel.engine.create import URL
-from sqlmodel.pool import StaticPool
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.config import settings
 from app.dependency import get_session
 from app.main import app
 
 
-@pytest.fixture(name="session")
-def session_fixture():
-    database_url = URL.create(
-        drivername="postgresql",
-        username=settings.DATABASE_USERNAME,
-        password=settings.DATABASE_PASSWORD,
-        host=settings.DATABASE_FQDN,
-        port=5432,
-        database="test",
-    )
-    engine = create_engine(database_url, poolclass=StaticPool)
-
-    SQLModel.metadata.drop_all(bind=engine)
-    SQLModel.metadata.create_all(bind=engine)
-
-    with Session(engine) as session:
-        yield session
-
-
 @pytest.fixture(name="client")
 def client_fixture(session: Session):
     def get_session_override():
@@ -39,3 +21,23 @@ def client_fixture(session: Session):
     yield client
 
     app.dependency_overrides.clear()
+
+
+# Serves requests with async sessions, like `DATABASE_ASYNC`. Not pooled, since each request
+# of the client runs in its own event loop
+@pytest.fixture(name="async_client")
+def async_client_fixture(engine: Engine):
+    async_engine = create_async_engine(
+        engine.url.set(drivername="postgresql+asyncpg"), poolclass=NullPool
+    )
+
+    async def get_session_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as async_session:
+            yield async_session
+
+    app.dependency_overrides[get_session] = get_session_override
+    client = TestClient(app)
+
+    yield client
+
+    app.dependency_overrides.clear()
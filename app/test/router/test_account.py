@@ -1,6 +1,8 @@
 from fastapi import status
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlalchemy import update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, delete
 
 from app import crud, model
 
@@ -94,6 +96,64 @@ def test_read_many_accounts_empty(client: TestClient):
     assert content == []
 
 
+def test_read_many_accounts_cursor(session: Session, client: TestClient):
+    input_0 = model.AccountInput(name="Checking")
+    row_0 = crud.account.create(session, input_0)
+
+    input_1 = model.AccountInput(name="Savings")
+    row_1 = crud.account.create(session, input_1)
+
+    response_0 = client.get("/account/", params={"limit": 1})
+    content_0 = response_0.json()
+
+    cursor = response_0.headers["X-Next-Cursor"]
+    response_1 = client.get("/account/", params={"limit": 1, "after": cursor})
+    content_1 = response_1.json()
+
+    assert response_0.status_code == status.HTTP_200_OK
+    assert [content["id"] for content in content_0] == [row_0.id]
+
+    assert response_1.status_code == status.HTTP_200_OK
+    assert [content["id"] for content in content_1] == [row_1.id]
+
+
+def test_read_many_accounts_by_ids(session: Session, client: TestClient):
+    input_0 = model.AccountInput(name="Checking")
+    row_0 = crud.account.create(session, input_0)
+
+    input_1 = model.AccountInput(name="Savings")
+    crud.account.create(session, input_1)
+
+    input_2 = model.AccountInput(name="Cash")
+    row_2 = crud.account.create(session, input_2)
+
+    transaction_input = model.TransactionInput(account_id=row_2.id, value=100)
+    crud.transaction.create(session, transaction_input)
+
+    ids = [row_2.id, row_0.id, row_2.id + 1]
+    get_response = client.get("/account/", params={"ids": ",".join(map(str, ids)), "limit": 1})
+    post_response = client.post("/account/batch", json=ids)
+
+    assert get_response.status_code == status.HTTP_200_OK
+    assert post_response.status_code == status.HTTP_200_OK
+    assert get_response.json() == post_response.json()
+    assert get_response.json() == [
+        {"id": row_0.id, "name": input_0.name, "balance": 0},
+        {"id": row_2.id, "name": input_2.name, "balance": 100},
+    ]
+
+
+def test_read_many_accounts_by_ids_invalid(client: TestClient):
+    invalid_response = client.get("/account/", params={"ids": "1,a"})
+    get_response = client.get("/account/", params={"ids": ",".join(["1"] * 1_001)})
+    post_response = client.post("/account/batch", json=[1] * 1_001)
+
+    assert invalid_response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert get_response.status_code == status.HTTP_400_BAD_REQUEST
+    assert post_response.status_code == status.HTTP_400_BAD_REQUEST
+    assert post_response.json()["detail"] == "More than 1000 ids"
+
+
 def test_update_account(session: Session, client: TestClient):
     input_ = model.AccountInput(name="Checking")
     row = crud.account.create(session, input_)
@@ -140,6 +200,25 @@ def test_delete_account(session: Session, client: TestClient):
     assert in_database is False
 
 
+def test_delete_account_with_transactions(session: Session, client: TestClient):
+    input_ = model.AccountInput(name="Checking")
+    row = crud.account.create(session, input_)
+
+    transaction_input = model.TransactionInput(account_id=row.id, value=1_000)
+    transaction_row = crud.transaction.create(session, transaction_input)
+
+    response = client.delete(f"/account/{row.id}")
+    content = response.json()
+
+    session.refresh(transaction_row)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert content["id"] == row.id
+    assert content["balance"] == 1_000
+
+    assert transaction_row.account_id is None
+
+
 def test_delete_account_invalid(session: Session, client: TestClient):
     input_ = model.AccountInput(name="Checking")
     row = crud.account.create(session, input_)
@@ -150,3 +229,152 @@ def test_delete_account_invalid(session: Session, client: TestClient):
 
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert content["detail"] == "Account not found"
+
+
+def test_read_many_accounts_etag(session: Session, client: TestClient):
+    input_ = model.AccountInput(name="Checking")
+    row = crud.account.create(session, input_)
+
+    response_0 = client.get("/account/")
+    etag_0 = response_0.headers["ETag"]
+
+    response_1 = client.get("/account/", headers={"If-None-Match": etag_0})
+
+    transaction_input = model.TransactionInput(account_id=row.id, value=1_000)
+    crud.transaction.create(session, transaction_input)
+
+    response_2 = client.get("/account/", headers={"If-None-Match": etag_0})
+    content_2 = response_2.json()
+
+    assert response_0.status_code == status.HTTP_200_OK
+    assert etag_0.startswith('W/"')
+    assert response_0.headers["Cache-Control"] == "private, no-cache"
+
+    assert response_1.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response_1.headers["ETag"] == etag_0
+    assert response_1.content == b""
+
+    assert response_2.status_code == status.HTTP_200_OK
+    assert response_2.headers["ETag"] != etag_0
+    assert content_2[0]["balance"] == 1_000
+
+
+def test_read_account_etag(session: Session, client: TestClient):
+    input_ = model.AccountInput(name="Checking")
+    row = crud.account.create(session, input_)
+
+    response_0 = client.get(f"/account/{row.id}")
+    etag_0 = response_0.headers["ETag"]
+
+    response_1 = client.get(f"/account/{row.id}", headers={"If-None-Match": f'"x", {etag_0}'})
+
+    client.put(f"/account/{row.id}", json={"name": "Savings"})
+    response_2 = client.get(f"/account/{row.id}", headers={"If-None-Match": etag_0})
+    content_2 = response_2.json()
+
+    assert response_1.status_code == status.HTTP_304_NOT_MODIFIED
+
+    assert response_2.status_code == status.HTTP_200_OK
+    assert content_2["name"] == "Savings"
+
+
+# Writes of other processes skip this process' invalidations until they are notified
+def test_read_account_other_process_write(engine: Engine, session: Session, client: TestClient):
+    input_ = model.AccountInput(name="Checking")
+    row = crud.account.create(session, input_)
+
+    client.get(f"/account/{row.id}")
+    with engine.begin() as connection:
+        connection.execute(
+            update(model.AccountDatabase)
+            .where(model.AccountDatabase.id == row.id)
+            .values(name="Savings")
+        )
+    response = client.get(f"/account/{row.id}")
+    etag = response.headers["ETag"]
+    conditional_response = client.get(f"/account/{row.id}", headers={"If-None-Match": etag})
+
+    assert response.json()["name"] == "Savings"
+    assert conditional_response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_read_account_balance(session: Session, client: TestClient):
+    checking_input = model.AccountInput(name="Checking")
+    checking_row = crud.account.create(session, checking_input)
+
+    savings_input = model.AccountInput(name="Savings")
+    savings_row = crud.account.create(session, savings_input)
+
+    transaction_input_0 = model.TransactionInput(account_id=checking_row.id, value=1_000)
+    transaction_row_0 = crud.transaction.create(session, transaction_input_0)
+
+    transaction_input_1 = model.TransactionInput(account_id=checking_row.id, value=-300)
+    transaction_row_1 = crud.transaction.create(session, transaction_input_1)
+
+    transaction_update_0 = model.TransactionUpdate(account_id=savings_row.id, value=500)
+    crud.transaction.update(session, transaction_row_0.id, transaction_update_0)
+
+    crud.transaction.delete(session, transaction_row_1.id)
+
+    response = client.get("/account/")
+    content = response.json()
+
+    mismatches = crud.account_balance.get_mismatches(session)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert content[0]["id"] == checking_row.id
+    assert content[0]["balance"] == 0
+    assert content[1]["id"] == savings_row.id
+    assert content[1]["balance"] == 500
+
+    assert mismatches == []
+
+
+def test_rebuild_account_balance(session: Session, client: TestClient):
+    input_ = model.AccountInput(name="Checking")
+    row = crud.account.create(session, input_)
+
+    transaction_input = model.TransactionInput(account_id=row.id, value=1_000)
+    crud.transaction.create(session, transaction_input)
+
+    session.execute(delete(model.AccountBalanceDatabase))
+    session.commit()
+
+    mismatches = crud.account_balance.get_mismatches(session)
+
+    crud.account_balance.rebuild(session)
+    session.commit()
+
+    response = client.get(f"/account/{row.id}")
+    content = response.json()
+
+    assert len(mismatches) == 1
+    assert mismatches[0].id == row.id
+    assert mismatches[0].stored_balance == 0
+    assert mismatches[0].actual_balance == 1_000
+
+    assert response.status_code == status.HTTP_200_OK
+    assert content["balance"] == 1_000
+
+
+def test_rebuild_account_balance_etag(session: Session, client: TestClient):
+    input_ = model.AccountInput(name="Checking")
+    row = crud.account.create(session, input_)
+
+    transaction_input = model.TransactionInput(account_id=row.id, value=1_000)
+    crud.transaction.create(session, transaction_input)
+
+    session.execute(delete(model.AccountBalanceDatabase))
+    session.commit()
+
+    response_0 = client.get(f"/account/{row.id}")
+    etag_0 = response_0.headers["ETag"]
+
+    crud.account_balance.rebuild(session)
+    session.commit()
+
+    response_1 = client.get(f"/account/{row.id}", headers={"If-None-Match": etag_0})
+
+    assert response_0.json()["balance"] == 0
+    assert response_1.status_code == status.HTTP_200_OK
+    assert response_1.json()["balance"] == 1_000
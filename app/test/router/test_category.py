@@ -1,6 +1,8 @@
+from datetime import date, datetime
+
 from fastapi import status
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from sqlmodel import Session, delete
 
 from app import crud, model
 
@@ -94,6 +96,26 @@ def test_read_many_categorys(session: Session, client: TestClient):
     assert content[1]["available"] == input_1.budget + 0
 
 
+def test_read_many_categorys_by_ids(session: Session, client: TestClient):
+    input_0 = model.CategoryInput(name="Rent", budget=1_000)
+    crud.category.create(session, input_0)
+
+    input_1 = model.CategoryInput(name="Food", budget=500)
+    row_1 = crud.category.create(session, input_1)
+
+    transaction_input = model.TransactionInput(category_id=row_1.id, value=-100)
+    crud.transaction.create(session, transaction_input)
+
+    get_response = client.get("/category/", params={"ids": str(row_1.id)})
+    post_response = client.post("/category/batch", json=[row_1.id])
+
+    assert get_response.status_code == status.HTTP_200_OK
+    assert get_response.json() == post_response.json()
+    assert get_response.json() == [
+        {"id": row_1.id, "name": input_1.name, "budget": 500, "expenditure": -100, "available": 400}
+    ]
+
+
 def test_read_many_categorys_empty(client: TestClient):
     response = client.get("/category/")
     content = response.json()
@@ -102,6 +124,152 @@ def test_read_many_categorys_empty(client: TestClient):
     assert content == []
 
 
+def test_read_many_categorys_month(session: Session, client: TestClient):
+    input_ = model.CategoryInput(name="Rent", budget=1_000)
+    row = crud.category.create(session, input_)
+
+    transaction_input_0 = model.TransactionInput(
+        date_time=datetime(2023, 1, 31, 23, 59), category_id=row.id, value=-800
+    )
+    crud.transaction.create(session, transaction_input_0)
+
+    transaction_input_1 = model.TransactionInput(
+        date_time=datetime(2023, 2, 1), category_id=row.id, value=-900
+    )
+    transaction_row_1 = crud.transaction.create(session, transaction_input_1)
+
+    transaction_update_1 = model.TransactionUpdate(date_time=datetime(2023, 1, 15))
+    crud.transaction.update(session, transaction_row_1.id, transaction_update_1)
+
+    january_response = client.get("/category/", params={"month": "2023-01"})
+    january_content = january_response.json()
+
+    february_response = client.get("/category/", params={"month": "2023-02"})
+    february_content = february_response.json()
+
+    all_time_response = client.get("/category/")
+    all_time_content = all_time_response.json()
+
+    mismatches = crud.category_month.get_mismatches(session)
+
+    assert january_response.status_code == status.HTTP_200_OK
+    assert january_content[0]["id"] == row.id
+    assert january_content[0]["budget"] == input_.budget
+    assert january_content[0]["expenditure"] == -1_700
+    assert january_content[0]["available"] == input_.budget - 1_700
+
+    assert february_response.status_code == status.HTTP_200_OK
+    assert february_content[0]["expenditure"] == 0
+    assert february_content[0]["available"] == input_.budget
+
+    assert all_time_content[0]["expenditure"] == -1_700
+
+    assert mismatches == []
+
+
+def test_read_many_categorys_month_offset(session: Session, client: TestClient):
+    input_ = model.CategoryInput(name="Rent", budget=1_000)
+    row = crud.category.create(session, input_)
+
+    transaction_input = {
+        "date_time": "2023-02-01T00:30:00+02:00",
+        "category_id": row.id,
+        "value": -800,
+    }
+    transaction_response = client.post("/transaction/", json=transaction_input)
+    transaction_date_time = datetime.fromisoformat(transaction_response.json()["date_time"])
+
+    response = client.get("/category/", params={"month": transaction_date_time.strftime("%Y-%m")})
+    content = response.json()
+
+    mismatches = crud.category_month.get_mismatches(session)
+
+    assert content[0]["expenditure"] == -800
+    assert mismatches == []
+
+
+def test_read_many_categorys_month_cached(session: Session, client: TestClient):
+    input_ = model.CategoryInput(name="Rent", budget=1_000)
+    row = crud.category.create(session, input_)
+
+    response_0 = client.get("/category/", params={"month": "2023-01"})
+    content_0 = response_0.json()
+
+    transaction_input = {"date_time": "2023-01-10T00:00:00", "category_id": row.id, "value": -800}
+    client.post("/transaction/", json=transaction_input)
+
+    response_1 = client.get("/category/", params={"month": "2023-01"})
+    content_1 = response_1.json()
+
+    response_2 = client.get("/category/", params={"month": "2023-01"})
+    content_2 = response_2.json()
+
+    assert content_0[0]["expenditure"] == 0
+    assert content_1[0]["expenditure"] == -800
+    assert content_2 == content_1
+    assert crud.category.cache.hits == 1
+
+
+def test_read_many_categorys_month_invalid(client: TestClient):
+    response = client.get("/category/", params={"month": "2023-13"})
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_rebuild_category_month(session: Session, client: TestClient):
+    input_ = model.CategoryInput(name="Rent", budget=1_000)
+    row = crud.category.create(session, input_)
+
+    transaction_input = model.TransactionInput(
+        date_time=datetime(2023, 1, 1), category_id=row.id, value=-800
+    )
+    crud.transaction.create(session, transaction_input)
+
+    session.execute(delete(model.CategoryMonthDatabase))
+    session.commit()
+
+    mismatches = crud.category_month.get_mismatches(session)
+
+    crud.category_month.rebuild(session)
+    session.commit()
+
+    response = client.get("/category/", params={"month": "2023-01"})
+    content = response.json()
+
+    assert len(mismatches) == 1
+    assert mismatches[0].category_id == row.id
+    assert mismatches[0].month == date(2023, 1, 1)
+    assert mismatches[0].stored_count == 0
+    assert mismatches[0].actual_expenditure == -800
+    assert mismatches[0].actual_count == 1
+
+    assert response.status_code == status.HTTP_200_OK
+    assert content[0]["expenditure"] == -800
+
+
+def test_rebuild_category_month_etag(session: Session, client: TestClient):
+    input_ = model.CategoryInput(name="Rent", budget=1_000)
+    row = crud.category.create(session, input_)
+
+    transaction_input = model.TransactionInput(category_id=row.id, value=-800)
+    crud.transaction.create(session, transaction_input)
+
+    session.execute(delete(model.CategoryMonthDatabase))
+    session.commit()
+
+    response_0 = client.get(f"/category/{row.id}")
+    etag_0 = response_0.headers["ETag"]
+
+    crud.category_month.rebuild(session)
+    session.commit()
+
+    response_1 = client.get(f"/category/{row.id}", headers={"If-None-Match": etag_0})
+
+    assert response_0.json()["expenditure"] == 0
+    assert response_1.status_code == status.HTTP_200_OK
+    assert response_1.json()["expenditure"] == -800
+
+
 def test_update_category(session: Session, client: TestClient):
     input_ = model.CategoryInput(name="Rent", budget=1_000)
     row = crud.category.create(session, input_)
@@ -155,6 +323,27 @@ def test_delete_category(session: Session, client: TestClient):
     assert in_database is False
 
 
+def test_delete_category_with_transactions(session: Session, client: TestClient):
+    input_ = model.CategoryInput(name="Rent", budget=1_000)
+    row = crud.category.create(session, input_)
+
+    transaction_input = model.TransactionInput(category_id=row.id, value=-200)
+    transaction_row = crud.transaction.create(session, transaction_input)
+
+    response = client.delete(f"/category/{row.id}")
+    content = response.json()
+
+    session.refresh(transaction_row)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert content["id"] == row.id
+    assert content["expenditure"] == -200
+    assert content["available"] == 800
+
+    assert transaction_row.category_id is None
+    assert crud.category_month.get_mismatches(session) == []
+
+
 def test_delete_category_invalid(session: Session, client: TestClient):
     input_ = model.CategoryInput(name="Rent", budget=1_000)
     row = crud.category.create(session, input_)
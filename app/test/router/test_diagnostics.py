@@ -0,0 +1,94 @@
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud, model
+from app.config import settings
+from app.diagnostics import memory
+
+HEADERS = {"X-Admin-Token": "token"}
+
+
+@pytest.fixture(name="admin")
+def admin_fixture(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "token")
+
+    yield
+
+    memory.stop()
+
+
+def test_memory_disabled(client: TestClient):
+    response = client.get("/diagnostics/memory", headers=HEADERS)
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.usefixtures("admin")
+def test_memory_invalid_token(client: TestClient):
+    responses = [
+        client.get("/diagnostics/memory"),
+        client.get("/diagnostics/memory", headers={"X-Admin-Token": "other"}),
+    ]
+
+    assert all(response.status_code == status.HTTP_403_FORBIDDEN for response in responses)
+
+
+@pytest.mark.usefixtures("admin")
+def test_memory_snapshot(client: TestClient):
+    start_response = client.post("/diagnostics/memory/start", headers=HEADERS)
+    first_id = client.post("/diagnostics/memory/snapshot", headers=HEADERS).json()["id"]
+    retained = [bytearray(100_000) for _ in range(10)]
+    second_id = client.post("/diagnostics/memory/snapshot", headers=HEADERS).json()["id"]
+
+    snapshot_response = client.get(
+        f"/diagnostics/memory/snapshot/{second_id}", params={"limit": 5}, headers=HEADERS
+    )
+    diff_response = client.get(
+        f"/diagnostics/memory/snapshot/{first_id}/diff/{second_id}", headers=HEADERS
+    )
+    missing_response = client.get("/diagnostics/memory/snapshot/999", headers=HEADERS)
+    stop_response = client.post("/diagnostics/memory/stop", headers=HEADERS)
+    diff_content = diff_response.json()
+
+    assert start_response.json()["tracing"] is True
+    assert len(snapshot_response.json()) == 5
+    assert "test_diagnostics.py" in diff_content[0]["traceback"][0]
+    assert diff_content[0]["size_diff_bytes"] >= 1_000_000
+    assert diff_content[0]["count_diff"] >= 10
+    assert missing_response.status_code == status.HTTP_404_NOT_FOUND
+    assert stop_response.json() == {
+        "tracing": False,
+        "current_bytes": 0,
+        "peak_bytes": 0,
+        "snapshot_ids": [],
+    }
+    assert len(retained) == 10
+
+
+@pytest.mark.usefixtures("admin")
+def test_memory_snapshot_not_tracing(client: TestClient):
+    response = client.post("/diagnostics/memory/snapshot", headers=HEADERS)
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+
+@pytest.mark.usefixtures("admin")
+def test_request_memory(session: Session, client: TestClient):
+    crud.account.create(session, model.AccountInput(name="Checking"))
+
+    client.get("/account/")
+    client.post("/diagnostics/memory/start", headers=HEADERS)
+    client.get("/account/")
+    client.get("/transaction/")
+    client.get("/account/1")
+
+    response = client.get("/diagnostics/memory/request", headers=HEADERS)
+    content = response.json()
+
+    assert [(request["method"], request["route"]) for request in content] == [
+        ("GET", "/account/"),
+        ("GET", "/transaction/"),
+    ]
+    assert all(request["peak_bytes"] > 0 for request in content)
@@ -0,0 +1,34 @@
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud, model
+
+
+def test_read_readiness(client: TestClient):
+    response = client.get("/health/ready")
+    content = response.json()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert content["database"] == "ok"
+    assert content["pool"]["size"] == 5
+    assert content["pool"]["checked_out"] >= 0
+    assert content["pool"]["idle"] >= 0
+    assert content["pool"]["wait_seconds_max"] >= 0
+
+
+def test_read_cache(session: Session, client: TestClient):
+    input_ = model.AccountInput(name="Checking")
+    row = crud.account.create(session, input_)
+
+    client.get(f"/account/{row.id}")
+    client.get(f"/account/{row.id}")
+
+    response = client.get("/health/cache")
+    content = response.json()
+    account_content = next(content for content in content if content["name"] == "account")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert account_content["size"] == 1
+    assert account_content["hits"] == 1
+    assert account_content["misses"] == 1
@@ -0,0 +1,58 @@
+from typing import Optional
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud, metrics, model
+
+
+def _get_sample(content: str, name: str, default: Optional[float] = None) -> float:
+    for line in content.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+
+    assert default is not None, f"{name} not found"
+    return default
+
+
+def test_read_metrics(session: Session, client: TestClient):
+    input_ = model.AccountInput(name="Checking")
+    row = crud.account.create(session, input_)
+    labels = 'method="GET",route="/account/{id_}"'
+    statements_name = f"http_request_statements_sum{{{labels}}}"
+    statements_before = _get_sample(metrics.render(), statements_name, 0)
+
+    client.get(f"/account/{row.id}")
+    client.get("/account/999")
+
+    response = client.get("/metrics")
+    content = response.text
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_request_duration_seconds histogram" in content
+    assert f'http_request_duration_seconds_count{{{labels},status="200"}}' in content
+    assert f'http_request_duration_seconds_count{{{labels},status="404"}}' in content
+    assert _get_sample(content, "http_requests_in_flight") == 1
+    assert _get_sample(content, statements_name) - statements_before == 4
+    assert _get_sample(content, f"http_request_database_duration_seconds_sum{{{labels}}}") > 0
+
+
+def test_histogram():
+    histogram = metrics.Histogram("test_seconds", "Test", ("name",), (1, 2))
+    metrics.metrics.remove(histogram)
+
+    histogram.observe(0.5, ("a",))
+    histogram.observe(1.5, ("a",))
+    histogram.observe(3, ("a",))
+
+    assert histogram.render() == [
+        "# HELP test_seconds Test",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{name="a",le="1"} 1',
+        'test_seconds_bucket{name="a",le="2"} 2',
+        'test_seconds_bucket{name="a",le="+Inf"} 3',
+        'test_seconds_sum{name="a"} 5.0',
+        'test_seconds_count{name="a"} 3',
+    ]
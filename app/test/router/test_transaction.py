@@ -1,4 +1,8 @@
-from datetime import datetime
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Any
 
 from fastapi import status
 from fastapi.testclient import TestClient
@@ -122,6 +126,107 @@ def test_create_transaction_invalid_category(client: TestClient):
     assert content["detail"] == "Category not found"
 
 
+def test_create_many_transactions(session: Session, client: TestClient):
+    account_input = model.AccountInput(name="Checking")
+    account_row = crud.account.create(session, account_input)
+
+    input_json: list[dict[str, Any]] = [
+        {
+            "date_time": "2020-03-04T18:52:50.637635",
+            "account_id": account_row.id,
+            "value": -1_000,
+            "comment": 'Rent, "March"',
+        },
+        {"date_time": "2020-03-05T10:00:00", "account_id": account_row.id, "value": 2_500},
+        {"value": None},
+        {"account_id": account_row.id + 1, "value": 10},
+    ]
+    response = client.post("/transaction/bulk", json=input_json)
+    content = response.json()
+
+    rows = crud.transaction.get_many(session, 0, 100)
+    account_response = client.get(f"/account/{account_row.id}")
+    account_content = account_response.json()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert content["created"] == 2
+    assert [error["index"] for error in content["errors"]] == [2, 3]
+    assert content["errors"][1]["detail"] == "Account not found"
+
+    assert len(rows) == 2
+    assert rows[0].date_time.isoformat() == input_json[0]["date_time"]
+    assert rows[0].comment == input_json[0]["comment"]
+    assert rows[1].payee_id is None
+    assert rows[1].comment is None
+
+    assert account_content["balance"] == 1_500
+
+
+def test_create_many_transactions_offset(session: Session, client: TestClient):
+    input_json = {"date_time": "2023-02-01T00:30:00+02:00", "value": 1}
+    client.post("/transaction/", json=input_json)
+    client.post("/transaction/bulk", json=[input_json])
+
+    rows = crud.transaction.get_many(session, 0, 100)
+
+    assert len(rows) == 2
+    assert rows[0].date_time == rows[1].date_time
+    assert rows[0].date_time.tzinfo is None
+
+
+def test_create_transaction_async_offset(session: Session, async_client: TestClient):
+    input_json = {"date_time": "2023-01-31T23:30:00+00:00", "value": 1}
+    expected_row = crud.transaction.create(session, model.TransactionInput(**input_json))
+
+    create_response = async_client.post("/transaction/", json=input_json)
+    id_ = create_response.json()["id"]
+    update_response = async_client.put(f"/transaction/{id_}", json=input_json)
+    read_response = async_client.get(f"/transaction/{id_}")
+    read_many_response = async_client.get(
+        "/transaction/", params={"date_time_from": "2023-01-31T23:30:00Z"}
+    )
+
+    assert create_response.status_code == status.HTTP_200_OK
+    assert update_response.status_code == status.HTTP_200_OK
+    assert read_response.json()["date_time"] == expected_row.date_time.isoformat()
+    assert [content["id"] for content in read_many_response.json()] == [expected_row.id, id_]
+
+
+def test_create_many_transactions_ndjson(client: TestClient):
+    input_ndjson = '{"value": 1}\n\n{"value": 2, "comment": ""}\nnot json\n'
+    response = client.post(
+        "/transaction/bulk", content=input_ndjson, headers={"Content-Type": "application/x-ndjson"}
+    )
+    content = response.json()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert content["created"] == 2
+    assert content["errors"] == [{"index": 3, "detail": "Invalid JSON"}]
+
+
+def test_create_many_transactions_not_objects(client: TestClient):
+    input_ndjson = '{"value": 1}\n1\n"x"\n[2]\n'
+    json_response = client.post("/transaction/bulk", json=[{"value": 1}, 1, "x", [2]])
+    ndjson_response = client.post(
+        "/transaction/bulk", content=input_ndjson, headers={"Content-Type": "application/x-ndjson"}
+    )
+
+    for response in [json_response, ndjson_response]:
+        content = response.json()
+
+        assert response.status_code == status.HTTP_200_OK
+        assert content["created"] == 1
+        assert content["errors"] == [
+            {"index": index, "detail": "Expected a JSON object"} for index in [1, 2, 3]
+        ]
+
+
+def test_create_many_transactions_invalid(client: TestClient):
+    response = client.post("/transaction/bulk", json={"value": 1})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 def test_read_transaction(session: Session, client: TestClient):
     account_input = model.AccountInput(name="Checking")
     account_row = crud.account.create(session, account_input)
@@ -252,6 +357,324 @@ def test_read_many_transactions_empty(client: TestClient):
     assert content == []
 
 
+def test_read_many_transactions_rows(session: Session):
+    input_ = model.TransactionInput(value=1_000, comment="Salary")
+    row = crud.transaction.create(session, input_)
+    session.expunge_all()
+
+    rows = crud.transaction.get_many_rows(session, 0, 100)
+
+    assert len(rows) == 1
+    assert not isinstance(rows[0], model.TransactionDatabase)
+    assert rows[0]._fields == tuple(crud.transaction.table.columns.keys())
+    assert rows[0].id == row.id
+    assert rows[0].comment == input_.comment
+    assert len(session.identity_map) == 0
+
+
+def test_read_many_transactions_by_ids(session: Session, client: TestClient):
+    input_0 = model.TransactionInput(value=1_000, comment="Salary")
+    row_0 = crud.transaction.create(session, input_0)
+
+    input_1 = model.TransactionInput(value=100, comment="Groceries")
+    crud.transaction.create(session, input_1)
+
+    input_2 = model.TransactionInput(value=10, comment="Coffee")
+    row_2 = crud.transaction.create(session, input_2)
+
+    get_response = client.get("/transaction/", params={"ids": f"{row_2.id},{row_0.id}"})
+    post_response = client.post("/transaction/batch", json=[row_2.id, row_0.id, row_2.id + 1])
+    get_content = get_response.json()
+
+    assert get_response.status_code == status.HTTP_200_OK
+    assert post_response.status_code == status.HTTP_200_OK
+    assert get_content == post_response.json()
+    assert [content["id"] for content in get_content] == [row_0.id, row_2.id]
+    assert [content["comment"] for content in get_content] == [input_0.comment, input_2.comment]
+
+
+def test_read_many_transactions_expanded(session: Session, client: TestClient):
+    account_input = model.AccountInput(name="Checking")
+    account_row = crud.account.create(session, account_input)
+
+    category_input = model.CategoryInput(name="Rent", budget=1_000)
+    category_row = crud.category.create(session, category_input)
+
+    input_0 = model.TransactionInput(
+        account_id=account_row.id, category_id=category_row.id, value=-1_000
+    )
+    row_0 = crud.transaction.create(session, input_0)
+
+    input_1 = model.TransactionInput(value=100)
+    row_1 = crud.transaction.create(session, input_1)
+
+    response = client.get("/transaction/", params={"expand": "account,category,account"})
+    ids_response = client.get(
+        "/transaction/", params={"ids": f"{row_0.id},{row_1.id}", "expand": "account,category"}
+    )
+    batch_response = client.post(
+        "/transaction/batch", params={"expand": "account,category"}, json=[row_0.id, row_1.id]
+    )
+    content = response.json()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert ids_response.json() == content
+    assert batch_response.json() == content
+    assert content[0]["account"] == {"id": account_row.id, "name": account_input.name}
+    assert content[0]["category"] == {"id": category_row.id, "name": category_input.name}
+    assert content[0]["account_id"] == account_row.id
+    assert "payee" not in content[0]
+    assert content[1]["account"] is None
+    assert content[1]["category"] is None
+
+
+def test_read_transaction_expanded(session: Session, client: TestClient):
+    payee_input = model.PayeeInput(name="Landlord")
+    payee_row = crud.payee.create(session, payee_input)
+
+    input_ = model.TransactionInput(payee_id=payee_row.id, value=-1_000)
+    row = crud.transaction.create(session, input_)
+
+    response_0 = client.get(f"/transaction/{row.id}", params={"expand": "payee"})
+    etag = response_0.headers["ETag"]
+    crud.payee.update_full(session, payee_row.id, model.PayeeUpdate(name="Owner"))
+    response_1 = client.get(
+        f"/transaction/{row.id}", params={"expand": "payee"}, headers={"If-None-Match": etag}
+    )
+
+    assert response_0.status_code == status.HTTP_200_OK
+    assert response_0.json()["payee"] == {"id": payee_row.id, "name": "Landlord"}
+    assert response_1.status_code == status.HTTP_200_OK
+    assert response_1.json()["payee"] == {"id": payee_row.id, "name": "Owner"}
+
+
+def test_read_many_transactions_expanded_invalid(client: TestClient):
+    response = client.get("/transaction/", params={"expand": "account,comment"})
+    content = response.json()
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert content["detail"] == "Invalid expand: comment"
+
+
+def test_read_many_transactions_schema(client: TestClient):
+    response = client.get("/openapi.json")
+    content = response.json()
+
+    schema = content["paths"]["/transaction/"]["get"]["responses"]["200"]["content"]
+    assert schema["application/json"]["schema"]["type"] == "array"
+    assert schema["application/json"]["schema"]["items"] == {
+        "$ref": "#/components/schemas/TransactionExpandedOutput"
+    }
+
+
+def test_read_many_transactions_cursor(session: Session, client: TestClient):
+    input_0 = model.TransactionInput(date_time=datetime(2020, 3, 5), value=100)
+    row_0 = crud.transaction.create(session, input_0)
+
+    input_1 = model.TransactionInput(date_time=datetime(2020, 3, 4), value=200)
+    row_1 = crud.transaction.create(session, input_1)
+
+    input_2 = model.TransactionInput(date_time=datetime(2020, 3, 5), value=300)
+    row_2 = crud.transaction.create(session, input_2)
+
+    response_0 = client.get("/transaction/", params={"limit": 2})
+    content_0 = response_0.json()
+
+    cursor = response_0.headers["X-Next-Cursor"]
+    response_1 = client.get("/transaction/", params={"limit": 2, "after": cursor})
+    content_1 = response_1.json()
+
+    assert response_0.status_code == status.HTTP_200_OK
+    assert [content["id"] for content in content_0] == [row_1.id, row_0.id]
+
+    assert response_1.status_code == status.HTTP_200_OK
+    assert [content["id"] for content in content_1] == [row_2.id]
+    assert "X-Next-Cursor" not in response_1.headers
+
+
+def test_read_many_transactions_cursor_invalid(client: TestClient):
+    response = client.get("/transaction/", params={"after": "invalid"})
+    content = response.json()
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert content["detail"] == "Invalid cursor"
+
+
+def test_read_many_transactions_filtered(session: Session, client: TestClient):
+    checking_input = model.AccountInput(name="Checking")
+    checking_row = crud.account.create(session, checking_input)
+
+    savings_input = model.AccountInput(name="Savings")
+    savings_row = crud.account.create(session, savings_input)
+
+    input_0 = model.TransactionInput(
+        date_time=datetime(2020, 3, 1), account_id=checking_row.id, value=-50, comment="Rent"
+    )
+    crud.transaction.create(session, input_0)
+
+    input_1 = model.TransactionInput(
+        date_time=datetime(2020, 3, 10), account_id=checking_row.id, value=-20, comment="Bus 50%"
+    )
+    row_1 = crud.transaction.create(session, input_1)
+
+    input_2 = model.TransactionInput(
+        date_time=datetime(2020, 3, 10), account_id=savings_row.id, value=-20, comment="Bus"
+    )
+    crud.transaction.create(session, input_2)
+
+    response_0 = client.get(
+        "/transaction/",
+        params={
+            "account_id": checking_row.id,
+            "date_time_from": "2020-03-05T00:00:00",
+            "date_time_to": "2020-03-31T00:00:00",
+            "value_min": -30,
+            "value_max": 0,
+        },
+    )
+    content_0 = response_0.json()
+
+    response_1 = client.get("/transaction/", params={"comment": "bus 50%"})
+    content_1 = response_1.json()
+
+    response_2 = client.get("/transaction/", params={"comment": "%"})
+    content_2 = response_2.json()
+
+    assert response_0.status_code == status.HTTP_200_OK
+    assert [content["id"] for content in content_0] == [row_1.id]
+
+    assert response_1.status_code == status.HTTP_200_OK
+    assert [content["id"] for content in content_1] == [row_1.id]
+
+    assert response_2.status_code == status.HTTP_200_OK
+    assert [content["id"] for content in content_2] == [row_1.id]
+
+
+def test_read_many_transactions_sorted(session: Session, client: TestClient):
+    input_0 = model.TransactionInput(value=100)
+    row_0 = crud.transaction.create(session, input_0)
+
+    input_1 = model.TransactionInput(value=300)
+    row_1 = crud.transaction.create(session, input_1)
+
+    input_2 = model.TransactionInput(value=200)
+    row_2 = crud.transaction.create(session, input_2)
+
+    response_0 = client.get("/transaction/", params={"sort": "-value", "limit": 2})
+    content_0 = response_0.json()
+
+    cursor = response_0.headers["X-Next-Cursor"]
+    response_1 = client.get("/transaction/", params={"sort": "-value", "after": cursor})
+    content_1 = response_1.json()
+
+    assert response_0.status_code == status.HTTP_200_OK
+    assert [content["id"] for content in content_0] == [row_1.id, row_2.id]
+
+    assert response_1.status_code == status.HTTP_200_OK
+    assert [content["id"] for content in content_1] == [row_0.id]
+
+
+def test_read_many_transactions_sort_invalid(client: TestClient):
+    response = client.get("/transaction/", params={"sort": "comment"})
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_read_many_transactions_filtered_plan(session: Session):
+    query = model.TransactionQuery(
+        account_id=1,
+        date_time_from=datetime(2020, 3, 1, tzinfo=timezone.utc),
+        date_time_to=datetime(2020, 3, 31, tzinfo=timezone.utc),
+    )
+    statement = crud.transaction.select_many(query)
+    compiled = statement.compile(dialect=session.get_bind().dialect)
+
+    connection = session.connection()
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    result = connection.exec_driver_sql(f"EXPLAIN {compiled}", compiled.params)
+    plan = list(result.scalars())
+
+    assert "ix_transaction_account_id_date_time" in plan[0]
+    assert "Index Cond" in plan[1] and "date_time >=" in plan[1] and "date_time <=" in plan[1]
+
+
+def test_read_many_transactions_sorted_plan(session: Session):
+    query = model.TransactionQuery(sort="-value")
+    keyset = crud.transaction.get_sort_keyset(query.sort)
+    statement = (
+        crud.transaction.select_many(query)
+        .order_by(*[column.desc() for column in keyset])
+        .limit(10)
+    )
+    compiled = statement.compile(dialect=session.get_bind().dialect)
+
+    connection = session.connection()
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    result = connection.exec_driver_sql(f"EXPLAIN {compiled}", compiled.params)
+    plan = "\n".join(result.scalars())
+
+    assert "Index Scan Backward using ix_transaction_value_id" in plan
+    assert "Sort" not in plan
+
+
+def test_export_transactions(session: Session, client: TestClient):
+    input_0 = model.TransactionInput(date_time=datetime(2020, 3, 5), value=100, comment="Rent")
+    row_0 = crud.transaction.create(session, input_0)
+
+    input_1 = model.TransactionInput(date_time=datetime(2020, 3, 4), value=200)
+    row_1 = crud.transaction.create(session, input_1)
+
+    response = client.get("/transaction/export")
+    content = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    assert content == [
+        {
+            "id": row_1.id,
+            "date_time": "2020-03-04T00:00:00",
+            "account_id": None,
+            "payee_id": None,
+            "category_id": None,
+            "value": 200,
+            "comment": None,
+        },
+        {
+            "id": row_0.id,
+            "date_time": "2020-03-05T00:00:00",
+            "account_id": None,
+            "payee_id": None,
+            "category_id": None,
+            "value": 100,
+            "comment": "Rent",
+        },
+    ]
+
+
+def test_export_transactions_csv(session: Session, client: TestClient):
+    input_ = model.TransactionInput(date_time=datetime(2020, 3, 4), value=100, comment="Rent")
+    row = crud.transaction.create(session, input_)
+
+    response = client.get("/transaction/export", params={"format": "csv"})
+    content = list(csv.reader(io.StringIO(response.text)))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Type"].startswith("text/csv")
+    assert content == [
+        ["id", "date_time", "account_id", "payee_id", "category_id", "value", "comment"],
+        [str(row.id), "2020-03-04T00:00:00", "", "", "", "100.0", "Rent"],
+    ]
+
+
+def test_export_transactions_empty(client: TestClient):
+    response = client.get("/transaction/export", params={"format": "csv"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.text.splitlines() == [
+        "id,date_time,account_id,payee_id,category_id,value,comment"
+    ]
+
+
 def test_update_transaction(session: Session, client: TestClient):
     account_input = model.AccountInput(name="Checking")
     account_row = crud.account.create(session, account_input)
@@ -317,6 +740,18 @@ def test_update_transaction_invalid(session: Session, client: TestClient):
     assert content["detail"] == "Transaction not found"
 
 
+def test_update_transaction_invalid_account(session: Session, client: TestClient):
+    input_ = model.TransactionInput(value=1_000)
+    row = crud.transaction.create(session, input_)
+
+    update_json = {"account_id": 1}
+    response = client.put(f"/transaction/{row.id}", json=update_json)
+    content = response.json()
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert content["detail"] == "Account not found"
+
+
 def test_delete_transaction(session: Session, client: TestClient):
     account_input = model.AccountInput(name="Checking")
     account_row = crud.account.create(session, account_input)
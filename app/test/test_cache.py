@@ -0,0 +1,69 @@
+import json
+import select
+import time
+from typing import cast
+
+from psycopg2.extensions import connection as PsycopgConnection
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app import crud, model
+from app.crud._cache import CHANNEL
+
+
+def _wait_for(condition) -> bool:
+    deadline = time.monotonic() + 5
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+
+    return True
+
+
+def test_cache_listener(engine: Engine):
+    cache = crud.account.cache
+    listener = crud.CacheListener(engine)
+    listener.start()
+    try:
+        # The listener invalidates everything once it starts listening
+        listening = _wait_for(lambda: cache.invalidations > 0)
+        cache.get_or_load(("row", 1), lambda: "Checking")
+        cache.get_or_load(("row", 2), lambda: "Savings")
+
+        payload = json.dumps({"source": "other", "invalidations": {"account": [1]}})
+        with engine.begin() as connection:
+            connection.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": CHANNEL, "payload": payload},
+            )
+        invalidated = _wait_for(lambda: len(cache) == 1)
+
+        value = cache.get_or_load(("row", 2), lambda: "Reloaded")
+    finally:
+        listener.stop()
+
+    assert listening is True
+    assert invalidated is True
+    assert value == "Savings"
+
+
+def test_write_notifies(engine: Engine):
+    connection = cast(PsycopgConnection, engine.raw_connection())
+    connection.set_session(autocommit=True)
+    with connection.cursor() as cursor:
+        cursor.execute(f"LISTEN {CHANNEL}")
+
+    with Session(engine) as session:
+        row = crud.account.create(session, model.AccountInput(name="Checking"))
+        row_id = row.id
+
+    select.select([connection], [], [], 5)
+    connection.poll()
+    payloads = [json.loads(notify.payload) for notify in connection.notifies]
+    connection.close()
+
+    assert len(payloads) == 1
+    assert payloads[0]["invalidations"] == {"account": [row_id]}
+    assert crud.decode_invalidations(json.dumps(payloads[0])) == {}
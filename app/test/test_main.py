@@ -0,0 +1,47 @@
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+from sqlmodel.engine.create import URL
+
+from app import crud, database, model
+from app.config import settings
+from app.dependency import get_session
+from app.main import app
+
+
+# Requests wait for pooled connections in threadpool threads, and release them in threadpool
+# threads too, so more requests than connections must not exhaust the threadpool
+def test_concurrent_requests_exhausted_pool(
+    monkeypatch: pytest.MonkeyPatch, database_url: URL, engine: Engine
+):
+    monkeypatch.setattr(settings, "DATABASE_MIGRATE_ON_STARTUP", False)
+    monkeypatch.setattr(settings, "CACHE_NOTIFY", False)
+    monkeypatch.setattr(settings, "DATABASE_POOL_SIZE", 1)
+    monkeypatch.setattr(settings, "DATABASE_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DATABASE_POOL_TIMEOUT", 2)
+    pool_engine = database.create_pooled_engine(database_url)
+    with Session(engine) as session:
+        crud.account.create(session, model.AccountInput(name="Checking"))
+
+    def get_session_override():
+        with Session(pool_engine) as session:
+            yield session
+
+    async def get_concurrently(url: str, count: int) -> list[httpx.Response]:
+        await app.router.startup()
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            responses = await asyncio.gather(*(client.get(url) for _ in range(count)))
+
+        return list(responses)
+
+    app.dependency_overrides[get_session] = get_session_override
+    try:
+        responses = asyncio.run(get_concurrently("/account/1", 3))
+    finally:
+        app.dependency_overrides.clear()
+        pool_engine.dispose()
+
+    assert [response.status_code for response in responses] == [200, 200, 200]
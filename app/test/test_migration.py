@@ -0,0 +1,93 @@
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, SQLModel, select
+
+from app import crud, migration, model
+
+# The schema `create_all` created before migrations and `account_balance` existed
+BASELINE_SCHEMA = [
+    "CREATE TABLE account (id SERIAL NOT NULL, name VARCHAR NOT NULL, PRIMARY KEY (id))",
+    "CREATE UNIQUE INDEX ix_account_name ON account (name)",
+    "CREATE TABLE category ("
+    "id SERIAL NOT NULL, name VARCHAR NOT NULL, budget FLOAT NOT NULL, PRIMARY KEY (id))",
+    "CREATE UNIQUE INDEX ix_category_name ON category (name)",
+    "CREATE TABLE payee (id SERIAL NOT NULL, name VARCHAR NOT NULL, PRIMARY KEY (id))",
+    "CREATE UNIQUE INDEX ix_payee_name ON payee (name)",
+    'CREATE TABLE "transaction" ('
+    "id SERIAL NOT NULL, "
+    "date_time TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+    "account_id INTEGER, "
+    "payee_id INTEGER, "
+    "category_id INTEGER, "
+    "value FLOAT NOT NULL, "
+    "comment VARCHAR, "
+    "PRIMARY KEY (id), "
+    "FOREIGN KEY(account_id) REFERENCES account (id), "
+    "FOREIGN KEY(payee_id) REFERENCES payee (id), "
+    "FOREIGN KEY(category_id) REFERENCES category (id))",
+]
+
+
+# Migrations start from an empty database
+@pytest.fixture(name="engine")
+def engine_fixture(engine: Engine):
+    SQLModel.metadata.drop_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS schema_migration"))
+
+    yield engine
+
+
+def test_migrate(engine: Engine):
+    applied = migration.migrate(engine)
+    applied_again = migration.migrate(engine)
+
+    inspector = inspect(engine)
+    table_names = set(inspector.get_table_names())
+    index_names = {index["name"] for index in inspector.get_indexes("transaction")}
+
+    assert [migration_.version for migration_ in applied] == [1, 2, 3, 4, 5, 6]
+    assert applied_again == []
+
+    assert table_names == set(SQLModel.metadata.tables) | {"schema_migration"}
+    assert index_names == {index.name for index in SQLModel.metadata.tables["transaction"].indexes}
+
+
+def test_migrate_target(engine: Engine):
+    applied = migration.migrate(engine, target=1)
+
+    applied_versions = migration.get_applied_versions(engine)
+    index_names = {index["name"] for index in inspect(engine).get_indexes("transaction")}
+
+    assert [migration_.version for migration_ in applied] == [1]
+    assert applied_versions == {1}
+    assert index_names == set()
+
+
+# Databases created by `create_all` before migrations existed
+def test_migrate_existing_schema(engine: Engine):
+    with engine.begin() as connection:
+        for statement in BASELINE_SCHEMA:
+            connection.execute(text(statement))
+        connection.execute(
+            text(
+                "INSERT INTO account (name) VALUES ('Checking'), ('Savings'); "
+                "INSERT INTO category (name, budget) VALUES ('Food', 100); "
+                'INSERT INTO "transaction" (date_time, account_id, category_id, value) VALUES '
+                "('2023-01-10', 1, 1, 500), ('2023-01-20', 1, NULL, 200), "
+                "('2023-02-10', 2, 1, -50)"
+            )
+        )
+
+    applied = migration.migrate(engine)
+
+    with Session(engine) as session:
+        balances = session.exec(select(model.AccountBalanceDatabase.balance)).all()
+        balance_mismatches = crud.account_balance.get_mismatches(session)
+        category_month_mismatches = crud.category_month.get_mismatches(session)
+
+    assert [migration_.version for migration_ in applied] == [1, 2, 3, 4, 5, 6]
+    assert sorted(balances) == [-50, 700]
+    assert balance_mismatches == []
+    assert category_month_mismatches == []
@@ -0,0 +1,72 @@
+import re
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import profiling
+
+SECRET = "secret"
+
+
+def _spin(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def _create_client(directory: Path, sample_rate: float = 0) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(
+        profiling.ProfilingMiddleware,
+        directory=str(directory),
+        secret=SECRET,
+        sample_rate=sample_rate,
+        interval_seconds=0.001,
+    )
+
+    @app.get("/item/{id_}")
+    def read_item(id_: int):
+        _spin(0.05)
+
+        return id_
+
+    return TestClient(app)
+
+
+def test_profile_signed(tmp_path: Path):
+    client = _create_client(tmp_path)
+    signature = profiling.sign(SECRET, int(time.time()))
+
+    response = client.get("/item/1", headers={profiling.HEADER: signature})
+    paths = list(tmp_path.iterdir())
+    lines = paths[0].read_text().splitlines()
+
+    assert response.json() == 1
+    assert [path.name for path in paths] == [response.headers[profiling.HEADER]]
+    assert re.fullmatch(r"\d{8}T\d{6}-GET-item_id-[0-9a-f]{8}\.collapsed", paths[0].name)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("read_item (" in line and "_spin (" in line for line in lines)
+
+
+def test_profile_invalid_signature(tmp_path: Path):
+    client = _create_client(tmp_path)
+    expired_signature = profiling.sign(SECRET, int(time.time()) - 3600)
+    other_signature = profiling.sign("other", int(time.time()))
+
+    responses = [
+        client.get("/item/1", headers={profiling.HEADER: signature})
+        for signature in [expired_signature, other_signature, "invalid"]
+    ]
+
+    assert all(profiling.HEADER not in response.headers for response in responses)
+    assert not list(tmp_path.iterdir())
+
+
+def test_profile_sampled(tmp_path: Path):
+    client = _create_client(tmp_path, sample_rate=1)
+
+    client.get("/item/1")
+
+    assert len(list(tmp_path.iterdir())) == 1
@@ -0,0 +1,64 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from app import crud, model, query_log
+
+
+def _create_app(engine) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(query_log.QueryLogMiddleware, repeat_threshold=3)
+
+    # Lazy loads the transactions of every account from `id_` on, one query per account
+    @app.get("/account/{id_}/lazy")
+    def read_lazy(id_: int):
+        with Session(engine) as session:
+            statement = select(model.AccountDatabase).where(model.AccountDatabase.id >= id_)
+            accounts = session.exec(statement).all()
+            counts = [len(account.transactions) for account in accounts]
+
+        return counts
+
+    @app.get("/slow")
+    def read_slow():
+        with engine.connect() as connection:
+            connection.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": 0.05})
+
+    return app
+
+
+def test_log_repeated(engine, caplog: pytest.LogCaptureFixture):
+    query_log.instrument(engine, slow_seconds=10)
+    with Session(engine) as session:
+        for name in ["Checking", "Savings", "Cash"]:
+            crud.account.create(session, model.AccountInput(name=name))
+    client = TestClient(_create_app(engine))
+
+    with caplog.at_level(logging.WARNING, logger="app.query_log"):
+        client.get("/account/1/lazy")
+
+    messages = [record.getMessage() for record in caplog.records]
+
+    assert len(messages) == 1
+    assert messages[0].startswith("Possible N+1 queries in GET /account/{id_}/lazy (4 statements)")
+    assert "3 times: SELECT transaction.id" in messages[0]
+
+
+def test_log_slow(engine, caplog: pytest.LogCaptureFixture):
+    query_log.instrument(engine, slow_seconds=0.04)
+    client = TestClient(_create_app(engine))
+
+    with caplog.at_level(logging.WARNING, logger="app.query_log"):
+        client.get("/slow")
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    messages = [record.getMessage() for record in caplog.records]
+
+    assert len(messages) == 1
+    assert messages[0].startswith("Slow query (")
+    assert "GET /slow: SELECT pg_sleep(%(seconds)s); parameters: {'seconds': 0.05}" in messages[0]
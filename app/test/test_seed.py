@@ -0,0 +1,67 @@
+from sqlalchemy import func, select
+from sqlmodel import Session
+
+from app import crud, model
+from app.tools import seed
+
+
+def test_generator_is_deterministic():
+    dataset = seed.Dataset(transactions=100, payees=50, categories=10, random_seed=1)
+
+    transactions = list(seed.Generator(dataset).get_transactions())
+    other_transactions = list(seed.Generator(dataset).get_transactions())
+    other_seed_transactions = list(
+        seed.Generator(
+            seed.Dataset(transactions=100, payees=50, categories=10, random_seed=2)
+        ).get_transactions()
+    )
+
+    assert transactions == other_transactions
+    assert transactions != other_seed_transactions
+    assert seed.Generator(dataset).get_categories() == seed.Generator(dataset).get_categories()
+
+
+def test_generator_is_skewed():
+    dataset = seed.Dataset(transactions=5_000, payees=100, categories=10)
+
+    transactions = list(seed.Generator(dataset).get_transactions())
+    payee_counts = [
+        sum(1 for data in transactions if data["payee_id"] == payee_id) for payee_id in [1, 100]
+    ]
+
+    assert payee_counts[0] > 10 * payee_counts[1]
+    assert all(
+        1 <= data["account_id"] <= dataset.accounts
+        and (data["category_id"] is None or 1 <= data["category_id"] <= dataset.categories)
+        for data in transactions
+    )
+
+
+def test_seed(session: Session):
+    crud.account.create(session, model.AccountInput(name="Existing"))
+    dataset = seed.Dataset(transactions=1_000, accounts=3, payees=20, categories=5)
+
+    assert not seed.is_empty(session)
+
+    seed.seed(session, dataset, batch_size=300)
+
+    counts = [
+        session.execute(select(func.count()).select_from(model_database)).scalar_one()
+        for model_database in [
+            model.AccountDatabase,
+            model.PayeeDatabase,
+            model.CategoryDatabase,
+            model.TransactionDatabase,
+        ]
+    ]
+    first_account = crud.account.get_row(session, 1)
+    first_transaction = crud.transaction.get_row(session, 1)
+    expected_transaction = next(seed.Generator(dataset).get_transactions())
+
+    assert counts == [3, 20, 5, 1_000]
+    assert first_account is not None
+    assert first_account.name == "Account 1"
+    assert first_transaction is not None
+    assert first_transaction._asdict() == {"id": 1, **expected_transaction}
+    assert crud.account_balance.get_mismatches(session) == []
+    assert crud.category_month.get_mismatches(session) == []
@@ -0,0 +1,26 @@
+from sqlalchemy import insert, text
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app import crud, model
+
+
+# Writers to the same table must not wait on each other, and the version must change when each
+# of them commits, in whichever order
+def test_table_version_concurrent_writers(engine: Engine, session: Session):
+    statement = insert(model.AccountDatabase)
+    with Session(engine) as session_0, Session(engine) as session_1:
+        session_1.execute(text("SET lock_timeout = '1s'"))
+        [version_0] = crud.table_version.get(session, ["account"])
+        session_0.execute(statement.values(name="Checking"))
+        session_1.execute(statement.values(name="Savings"))
+        session_1.commit()
+        [version_1] = crud.table_version.get(session, ["account"])
+        session_0.commit()
+        [version_2] = crud.table_version.get(session, ["account"])
+
+    session.execute(statement.values(name="Cash"))
+    session.commit()
+    [version_3] = crud.table_version.get(session, ["account"])
+
+    assert [version_1, version_2, version_3] == [version_0 + 1, version_0 + 2, version_0 + 3]
@@ -0,0 +1,432 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import crud, migration
+from app.config import settings
+from app.database import create_pooled_async_engine, create_pooled_engine, database_url, get_session
+from app.main import app
+from app.tools import seed
+
+
+class Scenario:
+    # `build` returns the keyword arguments of `httpx.AsyncClient.request`, and `weight` scales
+    # the number of requests for endpoints too heavy to call as often as the others
+    def __init__(
+        self,
+        name: str,
+        build: Callable[[random.Random, seed.Generator, list[int]], dict[str, Any]],
+        weight: float = 1,
+    ):
+        self.name = name
+        self.build = build
+        self.weight = weight
+
+
+class Result:
+    def __init__(self, name: str, latencies: list[float], errors: int, seconds: float):
+        self.name = name
+        self.requests = len(latencies)
+        self.errors = errors
+        self.p50 = _percentile(latencies, 0.50)
+        self.p95 = _percentile(latencies, 0.95)
+        self.p99 = _percentile(latencies, 0.99)
+        self.throughput = len(latencies) / seconds if seconds else 0.0
+
+
+def _transaction_json(random_: random.Random, generator: seed.Generator) -> dict[str, Any]:
+    data = generator.get_transaction(random_)
+    data["date_time"] = data["date_time"].isoformat()
+
+    return data
+
+
+# A random `YYYY-MM` month of the seeded period
+def _random_month(random_: random.Random, generator: seed.Generator) -> str:
+    return f"{random_.randint(generator.start.year, seed.END.year - 1)}-{random_.randint(1, 12):02}"
+
+
+# Reads run before writes so they see the seeded volume, and the delete scenario removes the
+# transactions added by the create scenario
+SCENARIOS = [
+    Scenario("health ready", lambda r, g, c: {"method": "GET", "url": "/health/ready"}),
+    Scenario("account list", lambda r, g, c: {"method": "GET", "url": "/account/"}),
+    Scenario(
+        "account read",
+        lambda r, g, c: {"method": "GET", "url": f"/account/{r.randint(1, g.dataset.accounts)}"},
+    ),
+    Scenario("payee list", lambda r, g, c: {"method": "GET", "url": "/payee/"}),
+    Scenario(
+        "payee read",
+        lambda r, g, c: {"method": "GET", "url": f"/payee/{r.randint(1, g.dataset.payees)}"},
+    ),
+    Scenario("category list", lambda r, g, c: {"method": "GET", "url": "/category/"}),
+    Scenario(
+        "category month",
+        lambda r, g, c: {
+            "method": "GET",
+            "url": "/category/",
+            "params": {"month": _random_month(r, g)},
+        },
+    ),
+    Scenario(
+        "category read",
+        lambda r, g, c: {"method": "GET", "url": f"/category/{r.randint(1, g.dataset.categories)}"},
+    ),
+    Scenario(
+        "transaction list",
+        lambda r, g, c: {"method": "GET", "url": "/transaction/", "params": {"limit": 100}},
+    ),
+    Scenario(
+        "transaction expand",
+        lambda r, g, c: {
+            "method": "GET",
+            "url": "/transaction/",
+            "params": {"limit": 100, "expand": "account,payee,category"},
+        },
+    ),
+    Scenario(
+        "transaction filter",
+        lambda r, g, c: {
+            "method": "GET",
+            "url": "/transaction/",
+            "params": {
+                "account_id": r.randint(1, g.dataset.accounts),
+                "date_time_from": f"{_random_month(r, g)}-01T00:00:00",
+                "sort": "-date_time",
+                "limit": 100,
+            },
+        },
+    ),
+    Scenario(
+        "transaction read",
+        lambda r, g, c: {
+            "method": "GET",
+            "url": f"/transaction/{r.randint(1, g.dataset.transactions)}",
+        },
+    ),
+    Scenario(
+        "transaction batch",
+        lambda r, g, c: {
+            "method": "POST",
+            "url": "/transaction/batch",
+            "json": [r.randint(1, g.dataset.transactions) for _ in range(100)],
+        },
+    ),
+    Scenario(
+        "payee batch",
+        lambda r, g, c: {
+            "method": "GET",
+            "url": "/payee/",
+            "params": {"ids": ",".join(str(r.randint(1, g.dataset.payees)) for _ in range(20))},
+        },
+    ),
+    Scenario(
+        "transaction export",
+        lambda r, g, c: {
+            "method": "GET",
+            "url": "/transaction/export",
+            "params": {"format": "csv"},
+        },
+        weight=0.02,
+    ),
+    Scenario(
+        "transaction create",
+        lambda r, g, c: {"method": "POST", "url": "/transaction/", "json": _transaction_json(r, g)},
+    ),
+    Scenario(
+        "transaction update",
+        lambda r, g, c: {
+            "method": "PUT",
+            "url": f"/transaction/{r.randint(1, g.dataset.transactions)}",
+            "json": {"value": round(r.uniform(-500, 100), 2)},
+        },
+    ),
+    Scenario(
+        "transaction delete", lambda r, g, c: {"method": "DELETE", "url": f"/transaction/{c.pop()}"}
+    ),
+    Scenario(
+        "transaction bulk",
+        lambda r, g, c: {
+            "method": "POST",
+            "url": "/transaction/bulk",
+            "json": [_transaction_json(r, g) for _ in range(100)],
+        },
+        weight=0.1,
+    ),
+    Scenario(
+        "category update",
+        lambda r, g, c: {
+            "method": "PUT",
+            "url": f"/category/{r.randint(1, g.dataset.categories)}",
+            "json": {"budget": r.randint(100, 1000)},
+        },
+    ),
+]
+
+
+def create_benchmark_engine(database: str) -> Engine:
+    with create_engine(database_url.set(database="postgres")).connect() as connection:
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        result = connection.execute(
+            text("SELECT 1 FROM pg_database WHERE datname = :database"), {"database": database}
+        )
+        if result.first() is None:
+            connection.execute(text(f'CREATE DATABASE "{database}"'))
+
+    engine = create_pooled_engine(database_url.set(database=database))
+
+    return engine
+
+
+def reset(engine: Engine, dataset: seed.Dataset) -> None:
+    with engine.begin() as connection:
+        connection.execute(text("DROP SCHEMA public CASCADE"))
+        connection.execute(text("CREATE SCHEMA public"))
+    migration.migrate(engine)
+
+    with Session(engine) as session:
+        seed.seed(session, dataset)
+
+    for cache in crud.caches:
+        cache.clear()
+
+
+def _override_session(engine: Engine) -> None:
+    if settings.DATABASE_ASYNC:
+        async_engine = create_pooled_async_engine(engine.url)
+
+        async def get_async_session():
+            async with AsyncSession(async_engine, expire_on_commit=False) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = get_async_session
+    else:
+
+        def get_sync_session():
+            with Session(engine) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = get_sync_session
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    generator: seed.Generator,
+    created: list[int],
+    *,
+    requests: int,
+    concurrency: int,
+) -> Result:
+    random_ = random.Random(f"{generator.dataset.random_seed}/{scenario.name}")
+    remaining = iter(range(requests))
+    latencies: list[float] = []
+    errors = 0
+
+    async def work() -> None:
+        nonlocal errors
+        for _ in remaining:
+            arguments = scenario.build(random_, generator, created)
+            start = time.perf_counter()
+            response = await client.request(**arguments)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            elif scenario.name == "transaction create":
+                created.append(response.json()["id"])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(work() for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+
+    return Result(scenario.name, latencies, errors, seconds)
+
+
+async def run_benchmark(
+    generator: seed.Generator, requests: int, concurrency: int, selected: Optional[list[str]]
+) -> list[Result]:
+    results = []
+    created: list[int] = []
+    async with httpx.AsyncClient(app=app, base_url="http://benchmark") as client:
+        for scenario in SCENARIOS:
+            if selected and scenario.name not in selected:
+                continue
+
+            count = max(1, math.ceil(requests * scenario.weight))
+            if scenario.name == "transaction delete":
+                count = min(count, len(created))
+            result = await run_scenario(
+                client, scenario, generator, created, requests=count, concurrency=concurrency
+            )
+            results.append(result)
+
+    return results
+
+
+def compare(
+    results: dict[str, Result], baseline: dict[str, dict[str, float]], tolerance: float
+) -> list[str]:
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+
+        p95 = baseline[key]["p95"]
+        throughput = baseline[key]["throughput"]
+        if result.p95 > p95 * (1 + tolerance):
+            regressions.append(
+                f"{key}: p95 {result.p95 * 1000:.1f} ms, baseline {p95 * 1000:.1f} ms"
+            )
+        if result.throughput < throughput * (1 - tolerance):
+            regressions.append(
+                f"{key}: throughput {result.throughput:.1f} req/s, "
+                f"baseline {throughput:.1f} req/s"
+            )
+
+    return regressions
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+
+    return ordered[index]
+
+
+def _print_results(transactions: int, results: list[Result]) -> None:
+    print(f"{transactions} transactions")
+    print(
+        f"  {'scenario':<20} {'requests':>8} {'errors':>6} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8}"
+    )
+    for result in results:
+        print(
+            f"  {result.name:<20} {result.requests:>8} {result.errors:>6} "
+            f"{result.p50 * 1000:>8.1f} {result.p95 * 1000:>8.1f} {result.p99 * 1000:>8.1f} "
+            f"{result.throughput:>8.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.tools.benchmark",
+        description=(
+            "Seed synthetic datasets into a dedicated database, load every endpoint through the "
+            "app and compare the latencies with a stored baseline"
+        ),
+    )
+    parser.add_argument(
+        "--database", default="benchmark", help="Database to (re)create, never the app database"
+    )
+    parser.add_argument(
+        "--transactions",
+        type=int,
+        nargs="+",
+        default=[1_000, 100_000],
+        help="Transaction volumes to seed and benchmark, e.g. 1000 100000 10000000",
+    )
+    defaults = seed.Dataset()
+    parser.add_argument("--accounts", type=int, default=defaults.accounts)
+    parser.add_argument("--payees", type=int, default=defaults.payees)
+    parser.add_argument("--categories", type=int, default=defaults.categories)
+    parser.add_argument("--years", type=int, default=defaults.years)
+    parser.add_argument(
+        "--seed", type=int, default=defaults.random_seed, help="Seed of the synthetic data"
+    )
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight")
+    parser.add_argument("--scenario", action="append", help="Only run the given scenarios")
+    parser.add_argument("--baseline", type=Path, default=Path("benchmark-baseline.json"))
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Store the results as the new baseline"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed relative regression of p95 latency and throughput",
+    )
+    arguments = parser.parse_args()
+
+    if arguments.database == database_url.database:
+        parser.error("The benchmark database is dropped and must not be the app database")
+
+    engine = create_benchmark_engine(arguments.database)
+    _override_session(engine)
+
+    results = {}
+    for transactions in arguments.transactions:
+        dataset = seed.Dataset(
+            transactions=transactions,
+            accounts=arguments.accounts,
+            payees=arguments.payees,
+            categories=arguments.categories,
+            years=arguments.years,
+            random_seed=arguments.seed,
+        )
+        start = time.perf_counter()
+        reset(engine, dataset)
+        print(f"Seeded {transactions} transactions in {time.perf_counter() - start:.1f} s")
+
+        volume_results = asyncio.run(
+            run_benchmark(
+                seed.Generator(dataset),
+                arguments.requests,
+                arguments.concurrency,
+                arguments.scenario,
+            )
+        )
+        _print_results(transactions, volume_results)
+        for result in volume_results:
+            results[f"{transactions}/{result.name}"] = result
+
+    failed = [key for key, result in results.items() if result.errors]
+    for key in failed:
+        print(f"{key}: {results[key].errors} failed requests")
+
+    if arguments.save_baseline:
+        baseline = {
+            key: {
+                "p50": result.p50,
+                "p95": result.p95,
+                "p99": result.p99,
+                "throughput": result.throughput,
+            }
+            for key, result in results.items()
+        }
+        arguments.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Saved baseline to {arguments.baseline}")
+        regressions = []
+    elif arguments.baseline.exists():
+        baseline = json.loads(arguments.baseline.read_text())
+        regressions = compare(results, baseline, arguments.tolerance)
+        for regression in regressions:
+            print(f"Regression in {regression}")
+        if not regressions:
+            print(f"No regression against {arguments.baseline}")
+    else:
+        print(f"No baseline at {arguments.baseline}, run with --save-baseline to store one")
+        regressions = []
+
+    if failed or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
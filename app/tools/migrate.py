@@ -0,0 +1,40 @@
+import argparse
+from typing import Optional
+
+from app import migration
+from app.database import engine
+
+
+def upgrade(target: Optional[int]) -> None:
+    applied = migration.migrate(engine, target)
+    for migration_ in applied:
+        print(f"Applied migration {migration_.version} ({migration_.name})")
+
+    if not applied:
+        print("Database schema is up to date")
+
+
+def status() -> None:
+    applied_versions = migration.get_applied_versions(engine)
+    for migration_ in migration.migrations:
+        state = "applied" if migration_.version in applied_versions else "pending"
+        print(f"Migration {migration_.version} ({migration_.name}): {state}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.tools.migrate",
+        description="Apply or list the database schema migrations",
+    )
+    parser.add_argument("command", choices=["upgrade", "status"])
+    parser.add_argument("--target", type=int, help="Last migration version to apply")
+    arguments = parser.parse_args()
+
+    if arguments.command == "upgrade":
+        upgrade(arguments.target)
+    else:
+        status()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import argparse
+import sys
+import time
+
+from app.config import settings
+from app.profiling import HEADER, sign
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.tools.profile",
+        description="Print a signed header that makes the app profile a request",
+    )
+    parser.parse_args()
+
+    if settings.PROFILE_SECRET is None:
+        print("PROFILE_SECRET is not set")
+        sys.exit(1)
+
+    print(f"{HEADER}: {sign(settings.PROFILE_SECRET, int(time.time()))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import bisect
+import itertools
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Iterator
+
+from sqlalchemy import func, insert, select, text
+from sqlmodel import Session
+
+from app import crud, model
+from app.database import engine
+
+# Fixed so the same seed always generates the same dataset
+END = datetime(2025, 1, 1)
+COMMENTS = [None, None, None, "groceries", "rent", "salary", "coffee", "fuel", "gift", "refund"]
+INCOME_PROBABILITY = 0.05
+BATCH_SIZE = 100_000
+TABLES = [
+    model.TransactionDatabase,
+    model.AccountBalanceDatabase,
+    model.CategoryMonthDatabase,
+    model.AccountDatabase,
+    model.PayeeDatabase,
+    model.CategoryDatabase,
+]
+
+
+class Dataset:
+    def __init__(
+        self,
+        *,
+        transactions: int = 100_000,
+        accounts: int = 10,
+        payees: int = 2_000,
+        categories: int = 40,
+        years: int = 5,
+        random_seed: int = 0,
+    ):
+        self.transactions = transactions
+        self.accounts = accounts
+        self.payees = payees
+        self.categories = categories
+        self.years = years
+        self.random_seed = random_seed
+
+
+# Generates skewed data like real budgets: a few accounts and payees get most transactions,
+# each payee mostly books to its own category, recent years have more transactions than old
+# ones and most values are small expenses
+class Generator:
+    def __init__(self, dataset: Dataset):
+        self.dataset = dataset
+        self.start = END - timedelta(days=365 * dataset.years)
+        self.span_seconds = int((END - self.start).total_seconds())
+        self.account_weights = _get_zipf_weights(dataset.accounts, 1.0)
+        self.payee_weights = _get_zipf_weights(dataset.payees, 1.1)
+        self.category_weights = _get_zipf_weights(dataset.categories, 0.8)
+
+        random_ = random.Random(f"{dataset.random_seed}/payee categories")
+        self.payee_categories = [
+            _choose(random_, self.category_weights) for _ in range(dataset.payees)
+        ]
+
+    def get_accounts(self) -> list[dict[str, Any]]:
+        return [{"name": f"Account {i}"} for i in range(1, self.dataset.accounts + 1)]
+
+    def get_payees(self) -> list[dict[str, Any]]:
+        return [{"name": f"Payee {i}"} for i in range(1, self.dataset.payees + 1)]
+
+    def get_categories(self) -> list[dict[str, Any]]:
+        random_ = random.Random(f"{self.dataset.random_seed}/categories")
+        categories = [
+            {"name": f"Category {i}", "budget": random_.randrange(50, 2_000, 50)}
+            for i in range(1, self.dataset.categories + 1)
+        ]
+
+        return categories
+
+    def get_transaction(self, random_: random.Random) -> dict[str, Any]:
+        payee_id = _choose(random_, self.payee_weights) if random_.random() < 0.9 else None
+        if payee_id is not None and random_.random() < 0.8:
+            category_id = self.payee_categories[payee_id - 1]
+        elif random_.random() < 0.7:
+            category_id = _choose(random_, self.category_weights)
+        else:
+            category_id = None
+
+        if random_.random() < INCOME_PROBABILITY:
+            value = round(random_.lognormvariate(7, 0.5), 2)
+        else:
+            value = -round(random_.lognormvariate(3, 1), 2)
+
+        data = {
+            # The square root puts more transactions in recent years
+            "date_time": self.start
+            + timedelta(seconds=int(self.span_seconds * random_.random() ** 0.5)),
+            "account_id": _choose(random_, self.account_weights),
+            "payee_id": payee_id,
+            "category_id": category_id,
+            "value": value,
+            "comment": random_.choice(COMMENTS),
+        }
+
+        return data
+
+    def get_transactions(self) -> Iterator[dict[str, Any]]:
+        random_ = random.Random(f"{self.dataset.random_seed}/transactions")
+        for _ in range(self.dataset.transactions):
+            yield self.get_transaction(random_)
+
+
+def is_empty(session: Session) -> bool:
+    for model_database in TABLES:
+        if session.execute(select(func.count()).select_from(model_database)).scalar_one():
+            return False
+
+    return True
+
+
+# Replaces the data of every table, restarting the ids so the generated references hold
+def seed(session: Session, dataset: Dataset, batch_size: int = BATCH_SIZE) -> None:
+    generator = Generator(dataset)
+    table_names = ", ".join(f'"{model_database.__tablename__}"' for model_database in TABLES)
+    session.execute(text(f"TRUNCATE {table_names} RESTART IDENTITY"))
+    session.execute(insert(model.AccountDatabase), generator.get_accounts())
+    session.execute(insert(model.PayeeDatabase), generator.get_payees())
+    session.execute(insert(model.CategoryDatabase), generator.get_categories())
+    session.commit()
+
+    transactions = generator.get_transactions()
+    while batch := list(itertools.islice(transactions, batch_size)):
+        crud.transaction.create_many(session, batch)
+
+    session.execute(text("ANALYZE"))
+    session.commit()
+
+
+def _get_zipf_weights(count: int, exponent: float) -> list[float]:
+    return list(itertools.accumulate(1 / rank**exponent for rank in range(1, count + 1)))
+
+
+# Returns an id (1 based) drawn with the given cumulative weights
+def _choose(random_: random.Random, cumulative_weights: list[float]) -> int:
+    return bisect.bisect(cumulative_weights, random_.random() * cumulative_weights[-1]) + 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.tools.seed",
+        description="Load a deterministic synthetic dataset into the database",
+    )
+    defaults = Dataset()
+    parser.add_argument("--transactions", type=int, default=defaults.transactions)
+    parser.add_argument("--accounts", type=int, default=defaults.accounts)
+    parser.add_argument("--payees", type=int, default=defaults.payees)
+    parser.add_argument("--categories", type=int, default=defaults.categories)
+    parser.add_argument(
+        "--years", type=int, default=defaults.years, help="Years of transactions before 2025"
+    )
+    parser.add_argument("--seed", type=int, default=defaults.random_seed)
+    parser.add_argument(
+        "--reset", action="store_true", help="Replace the data of a database that isn't empty"
+    )
+    arguments = parser.parse_args()
+
+    dataset = Dataset(
+        transactions=arguments.transactions,
+        accounts=arguments.accounts,
+        payees=arguments.payees,
+        categories=arguments.categories,
+        years=arguments.years,
+        random_seed=arguments.seed,
+    )
+    with Session(engine) as session:
+        if not arguments.reset and not is_empty(session):
+            print("The database already has data, run with --reset to replace it")
+            sys.exit(1)
+
+        start = time.perf_counter()
+        seed(session, dataset)
+
+    print(
+        f"Seeded {dataset.accounts} accounts, {dataset.payees} payees, "
+        f"{dataset.categories} categories and {dataset.transactions} transactions "
+        f"in {time.perf_counter() - start:.1f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
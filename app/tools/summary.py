@@ -0,0 +1,65 @@
+import argparse
+import sys
+
+from sqlmodel import Session
+
+from app import crud
+from app.database import engine
+
+
+def rebuild(session: Session) -> None:
+    crud.account_balance.rebuild(session)
+    crud.category_month.rebuild(session)
+    session.commit()
+
+    print("Rebuilt account balances and category months")
+
+
+def verify(session: Session) -> bool:
+    mismatches = crud.account_balance.get_mismatches(session)
+    for mismatch in mismatches:
+        print(
+            f"Account {mismatch.id}: stored balance {mismatch.stored_balance}, "
+            f"actual balance {mismatch.actual_balance}"
+        )
+
+    if mismatches:
+        print(f"Found {len(mismatches)} mismatched account balances")
+    else:
+        print("Account balances are consistent")
+
+    month_mismatches = crud.category_month.get_mismatches(session)
+    for month_mismatch in month_mismatches:
+        print(
+            f"Category {month_mismatch.category_id} in {month_mismatch.month:%Y-%m}: "
+            f"stored expenditure {month_mismatch.stored_expenditure} "
+            f"({month_mismatch.stored_count} transactions), "
+            f"actual expenditure {month_mismatch.actual_expenditure} "
+            f"({month_mismatch.actual_count} transactions)"
+        )
+
+    if month_mismatches:
+        print(f"Found {len(month_mismatches)} mismatched category months")
+    else:
+        print("Category months are consistent")
+
+    return not mismatches and not month_mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.tools.summary",
+        description="Rebuild or verify the summary tables maintained by transaction writes",
+    )
+    parser.add_argument("command", choices=["rebuild", "verify"])
+    arguments = parser.parse_args()
+
+    with Session(engine) as session:
+        if arguments.command == "rebuild":
+            rebuild(session)
+        elif not verify(session):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+#!/bin/bash
+
+poetry run python -m app.tools.summary rebuild